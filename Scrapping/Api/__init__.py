@@ -0,0 +1 @@
+from .server import CatalogServer, CatalogSnapshot
\ No newline at end of file
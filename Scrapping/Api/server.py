@@ -0,0 +1,206 @@
+import json
+import threading
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Final, Iterable, NamedTuple
+from urllib.parse import parse_qs, urlsplit
+
+
+class CatalogSnapshot(NamedTuple):
+    """
+    In-memory, read-only view of the classes served by the API.
+
+    Attributes:
+        version (int): Snapshot version (see Database.snapshot_version), used as ETag.
+        classes (list[dict]): Classes of every period, with the Database.get_df columns.
+        by_code (dict[str, list[dict]]): The classes of each subject code.
+        subjects (list[dict]): One summary per subject of the active period.
+        period (str | None): The active period, served when a request doesn't ask for one.
+    """
+    version: int
+    classes: list[dict]
+    by_code: dict[str, list[dict]]
+    subjects: list[dict]
+    period: str | None
+
+    @classmethod
+    def build(cls, version: int, classes: list[dict], period: str | None = None) -> "CatalogSnapshot":
+        by_code: dict[str, list[dict]] = {}
+        for class_info in classes:
+            by_code.setdefault(class_info["code"], []).append(class_info)
+        active = {
+            code: [row for row in rows if period is None or row["period"] == period]
+            for code, rows in by_code.items()
+        }
+        subjects = [
+            {
+                "code": code,
+                "subject": rows[0]["subject"],
+                "classes": len(rows),
+                "available_spots": sum(row["available_spots"] for row in rows),
+            }
+            for code, rows in sorted(active.items())
+            if rows
+        ]
+        return cls(version, classes, by_code, subjects, period)
+
+
+class CatalogServer:
+    """
+    Local HTTP/JSON API serving the class catalog from memory.
+
+        GET /subjects                       one summary per subject
+        GET /classes?code=FGA0001&period=   classes, optionally filtered
+        GET /availability?code=FGA0001      classes with available spots
+        GET /status                         snapshot version
+
+    Classes are served from the active period unless the request asks for another
+    period still in the database (period=2024.2) or for every one (period=all).
+
+    Responses carry an ETag keyed on the snapshot version and answer 304 to a matching
+    If-None-Match, are gzip compressed when the client accepts it, and listings are
+    streamed as chunked JSON, so polling clients never touch the database or the scraper.
+    """
+
+    CHUNK_SIZE: Final = 64 * 1024
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8080):
+        # Not a real version: snapshot_version() is 0 for a database filled before versions
+        # were kept, which must still be loaded by the first refresh
+        self._snapshot = CatalogSnapshot.build(-1, [])
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True, name="catalog-api")
+
+    @property
+    def address(self) -> tuple[str, int]:
+        return self._server.server_address[:2]
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
+
+    def publish(self, version: int, classes: list[dict], period: str | None = None) -> None:
+        """
+        Replace the served snapshot. Requests in flight keep the snapshot they started with.
+
+        :param version: Snapshot version of the classes.
+        :param classes: Classes with the Database.get_df columns.
+        :param period: The active period, None to serve every period by default.
+        """
+        self._snapshot = CatalogSnapshot.build(version, classes, period)
+
+    def refresh(self, db) -> bool:
+        """
+        Load the classes of a Database if its snapshot version changed.
+
+        :param db: The Database.
+        :return: True if a new snapshot was published.
+        """
+        version = db.snapshot_version()
+        if version == self._snapshot.version:
+            return False
+        self.publish(version, db.get_df("all").to_dict("records"), db.active_period())
+        return True
+
+    def start(self) -> "CatalogServer":
+        self._thread.start()
+        host, port = self.address
+        print(f"API listening on http://{host}:{port}")
+        return self
+
+    def stop(self) -> None:
+        if self._thread.is_alive():
+            self._server.shutdown()
+        self._server.server_close()
+
+    def _route(self, path: str, params: dict[str, str], snapshot: CatalogSnapshot) -> Iterable[dict] | dict | None:
+        """The JSON document of a request: a dict, an iterable of items (streamed as an array) or None (404)."""
+        if path == "/status":
+            return {
+                "version": snapshot.version,
+                "period": snapshot.period,
+                "classes": len(snapshot.classes),
+                "subjects": len(snapshot.subjects),
+            }
+        if path == "/subjects":
+            return snapshot.subjects
+        if path in ("/classes", "/availability"):
+            code = params.get("code", "").upper()
+            classes = snapshot.by_code.get(code, []) if code else snapshot.classes
+            period = params.get("period", snapshot.period)
+            return (
+                class_info for class_info in classes
+                if (period in (None, "all") or class_info["period"] == period)
+                and (path == "/classes" or class_info["available_spots"] > 0)
+            )
+        return None
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                snapshot = api._snapshot
+                url = urlsplit(self.path)
+                params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                document = api._route(url.path.rstrip("/") or "/", params, snapshot)
+                if document is None:
+                    self.send_error(404, "Unknown endpoint")
+                    return
+
+                gzip = "gzip" in self.headers.get("Accept-Encoding", "")
+                etag = f'"{snapshot.version}{"-gz" if gzip else ""}"'
+                if etag in [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("ETag", etag)
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Vary", "Accept-Encoding")
+                if gzip:
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                compressor = zlib.compressobj(wbits=31) if gzip else None
+                for chunk in self._json_chunks(document):
+                    if compressor is not None:
+                        chunk = compressor.compress(chunk)
+                    self._write_chunk(chunk)
+                if compressor is not None:
+                    self._write_chunk(compressor.flush())
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _json_chunks(self, document) -> Iterable[bytes]:
+                """Encode the document, streaming arrays item by item in CHUNK_SIZE pieces."""
+                if isinstance(document, dict):
+                    yield json.dumps(document, ensure_ascii=False).encode()
+                    return
+                buffer = ["["]
+                size = 1
+                for index, item in enumerate(document):
+                    text = ("," if index else "") + json.dumps(item, ensure_ascii=False)
+                    buffer.append(text)
+                    size += len(text)
+                    if size >= api.CHUNK_SIZE:
+                        yield "".join(buffer).encode()
+                        buffer, size = [], 0
+                buffer.append("]")
+                yield "".join(buffer).encode()
+
+            def _write_chunk(self, chunk: bytes) -> None:
+                if chunk:
+                    self.wfile.write(f"{len(chunk):X}\r\n".encode() + chunk + b"\r\n")
+
+            def log_message(self, *_):
+                pass
+
+        return Handler
@@ -1,30 +1,95 @@
 # Starting app logic
-from Telegram.telegram_bot import SIGAAMOS_bot
+from __future__ import annotations
+
+# Selenium, pandas and the Telegram stack are slow to import, so they are only
+# imported when first needed (see `scraper`, `start_bot` and `get_data`)
 from Database.database import Database
-from SIGAA.scrapping import SIGAA_Scraper
-import pandas as pd
+from Database.snapshots import SnapshotArchiver
+from Jobs import JobQueue
+from App.memory import MemoryGuard
+from SIGAA.resilience import CircuitBreaker, RetryPolicy, ScraperError
 
+from typing import TYPE_CHECKING, Callable
+import os
+import signal
+import socket
 import threading
-import time
 from datetime import datetime
 import asyncio  # Added for event loop management
 
+if TYPE_CHECKING:
+    import pandas as pd
+    from SIGAA.scrapping import SIGAA_Scraper
+    from SIGAA.sharding import ShardedScraper
+
 class App:
     """
     The App class serves as the main application logic for scraping data from SIGAA,
     storing it in a database, and providing filtered access to the data.
     """
-    def __init__(self):
+    SCRAPE_INTERVAL = 2 * 60  # Seconds between two scrapes of the same department
+    EXIT_MEMORY = 3  # Exit status when the process outgrew MEMORY_MAX_RSS_MB, for the supervisor to restart it
+    
+    def __init__(self, scraper_factory: Callable[[], SIGAA_Scraper] | None = None):
         """
-        Initializes the App instance by creating instances of SIGAA_Scraper and Database.
+        Initializes the App instance by creating the Database.
+        The SIGAA_Scraper (and its browser) is only started when something needs to scrape.
+        
+        Args:
+            scraper_factory (Callable, optional): Builds the scraper. Defaults to SIGAA_Scraper,
+                an offline scraper can be given for soak tests.
         """
-        self.__scraper = SIGAA_Scraper()
+        self._scraper_factory = scraper_factory
+        self.__scraper: SIGAA_Scraper | None = None
+        self.__sharded: ShardedScraper | None = None  # Keeps its browser sessions between cycles
         self.__db = Database()
+        self.__archiver = SnapshotArchiver(os.getenv("SNAPSHOT_DIR"))
         self._stop_event = threading.Event()  # Event to signal threads to stop
+        self.exit_code = 0
+        self.retry = RetryPolicy()
+        self.breaker = CircuitBreaker()
+        self.memory = MemoryGuard()
+        # Department values to scrape; empty scrapes the default department (FCTE)
+        self.departments = [d.strip() for d in os.getenv("SIGAA_DEPARTMENTS", "").split(",") if d.strip()]
+        self._failed_departments: list[str] = []  # Departments missing from the last scrape
+        
+    @property
+    def scraper(self) -> SIGAA_Scraper:
+        """
+        The SIGAA_Scraper, launching the browser on first use.
+        """
+        if self.__scraper is None:
+            if self._scraper_factory is None:
+                from SIGAA.scrapping import SIGAA_Scraper
+                self._scraper_factory = SIGAA_Scraper
+            self.__scraper = self._scraper_factory()
+        return self.__scraper
+    
+    def _reset_scraper(self) -> None:
+        """
+        Quits the current browsers, so the next scrape starts new ones.
+        """
+        if self.__scraper is not None:
+            self.__scraper.quit()
+            self.__scraper = None
+        if self.__sharded is not None:
+            self.__sharded.close()
         
-    def setup(self, TOKEN: str):
-        self.scrape()
-        self.set_database()
+    def setup(self, TOKEN: str, fast_start: bool = False):
+        """
+        Prepares the app before running it.
+        
+        Args:
+            TOKEN (str): Telegram bot token.
+            fast_start (bool): If True, skip the blocking first scrape: the bot answers
+                from the last snapshot persisted in the database and the first scrape
+                runs in the scraper thread started by `run`.
+        """
+        if not fast_start:
+            self.scrape_with_retry()
+            self.set_database()
+        else:
+            self.warm_start()
         self.start_bot(TOKEN)
         
     def run(self):
@@ -39,10 +104,95 @@ class App:
         """
         Scrapes data from the SIGAA portal by accessing the portal and classes,
         and updates the class information.
+        Several departments are scraped with concurrent browsers (see ShardedScraper),
+        as many as the host's free memory and CPUs allow, or SIGAA_SHARDS. The browsers
+        are kept between cycles and quit with the other browsers by _reset_scraper.
+        """
+        if len(self.departments) > 1:
+            from SIGAA.sharding import ShardedScraper, format_report
+            
+            if self.__sharded is None:
+                shards = int(os.getenv("SIGAA_SHARDS", "0")) or None
+                self.__sharded = ShardedScraper(self.departments, shards=shards, scraper_factory=self._scraper_factory)
+            self._data, reports, self._failed_departments = self.__sharded.run()
+            print(format_report(reports))
+        else:
+            self._failed_departments = []
+            self.scraper.access_portal()
+            self.scraper.access_classes(self.departments[0] if self.departments else None)
+            self._data = self.scraper.update_classes_info()
+        self.archive()
+        
+    def scrape_with_retry(self) -> None:
+        """
+        Scrapes with the retry policy. The browser is only restarted when it failed
+        itself; a slow, unreachable or changed SIGAA keeps the same browser for the next attempt.
+        """
+        self.retry.call(self.scrape, self._stop_event, self._on_scrape_failure)
+        
+    def _on_scrape_failure(self, error: Exception) -> None:
+        if isinstance(error, ScraperError):
+            return
+        from SIGAA.scrapping import is_browser_failure
+        
+        if is_browser_failure(error):
+            self._reset_scraper()
+            
+    def _record_scrape(self, rows: int | None = None, error: Exception | None = None,
+                       failed: list[str] | None = None) -> None:
         """
-        self.__scraper.access_portal()
-        self.__scraper.access_classes()
-        self._data = self.__scraper.update_classes_info(True)
+        Updates the circuit breaker and persists the outcome of a scrape, so the bot
+        can tell how fresh its data is.
+        
+        A partial scrape (some departments failed) is not a success: the failed departments
+        keep their previous data, so the last success and the breaker are left untouched.
+        """
+        now = datetime.now().isoformat(timespec="seconds")
+        if error is None and failed:
+            self.__db.set_meta({
+                "last_partial_at": now,
+                "last_partial_rows": rows,
+                "failed_departments": ",".join(failed),
+                "last_error_at": now,
+                "last_error": f"{len(failed)} departments failed: {', '.join(failed)}"[:500],
+            })
+        elif error is None:
+            self.breaker.record_success()
+            self.__db.set_meta({"last_success_at": now, "last_success_rows": rows, "failed_departments": ""})
+        else:
+            self.breaker.record_failure()
+            self.__db.set_meta({"last_error_at": now, "last_error": str(error)[:500]})
+        
+    def archive(self, data: list[dict] | None = None, source: str | None = None) -> None:
+        """
+        Archives the last scraped data as a Parquet snapshot.
+        
+        Args:
+            data (list[dict], optional): Scraped data. Defaults to the data of the last cycle.
+            source (str, optional): Department the data comes from, None for a full cycle.
+        """
+        try:
+            for path in self.__archiver.write(self._data if data is None else data, source=source):
+                print(f"Saved snapshot in {path}")
+        except Exception as e:
+            print(f"Could not archive snapshot: {e}")
+            
+    def warm_start(self) -> None:
+        """
+        Fills an empty database with the latest archived snapshot. A database that
+        already holds classes (the usual restart) is used as is, without reading the
+        archive, which would import pandas.
+        """
+        if self.__db.has_classes():
+            return
+        try:
+            self._data = self.__archiver.load_latest()
+        except Exception as e:
+            print(f"Could not load the latest snapshot: {e}")
+            return
+        if self._data:
+            self.set_database()
+        self._data = []
         
     def run_scraper(self):
         """
@@ -53,25 +203,107 @@ class App:
         asyncio.set_event_loop(loop)
 
         while not self._stop_event.is_set():  # Loop until stop event is set
-            try:
-                self.scrape()
-                self.__db.update_classes(self._data)
-                print(f"Database updated at {datetime.now().strftime('%Y-%m-%d %H:%M')}\n")
-                loop.run_until_complete(self.bot._notify_users())  # Run the coroutine in the thread's event loop
-            except Exception as e:
-                print(f"Scraper encountered an error: {e}")
-                # Restart WebDriver if necessary
-                self.__scraper.quit()
-                self.__scraper = SIGAA_Scraper()
-            finally:
-                for _ in range(2 * 60):  # Sleep for 10 minutes in 1-second intervals
-                    if self._stop_event.is_set():
-                        break
-                    time.sleep(1)
+            if not self.breaker.allow():
+                # SIGAA is down: don't launch browsers until the breaker lets a trial through
+                self._stop_event.wait(self.breaker.remaining())
+                continue
+            self.cycle(loop)
+            self._stop_event.wait(self.SCRAPE_INTERVAL)
 
         # Close the event loop when the thread stops
         loop.close()
         
+    def cycle(self, loop: asyncio.AbstractEventLoop | None = None) -> None:
+        """
+        Runs one scraping cycle: scrape, store, archive, notify the users (when the bot
+        is set up) and check the memory.
+        
+        Args:
+            loop (asyncio.AbstractEventLoop, optional): Event loop running the notifications.
+        """
+        try:
+            self.scrape_with_retry()
+            changes = self.__db.upsert_classes(self._data)  # Raises, so a failed write is not recorded as a success
+            self.__db.archive_past_periods(self.__archiver, {c["Ano-Período"] for c in self._data})
+            self._record_scrape(rows=len(self._data), failed=self._failed_departments)
+            print(f"Database updated at {datetime.now().strftime('%Y-%m-%d %H:%M')}\n")
+            if loop is not None and hasattr(self, "bot"):
+                loop.run_until_complete(self.bot._notify_users())  # Run the coroutine in the thread's event loop
+                loop.run_until_complete(self.bot._notify_rules(changes))
+        except Exception as e:
+            print(f"Scraper encountered an error: {e}")
+            self._record_scrape(error=e)
+        finally:
+            # Don't keep the last scrape alive until the next cycle
+            self._data = []
+            self._check_memory()
+            
+    def _check_memory(self) -> None:
+        """
+        Samples the memory after a cycle and restarts the browser when it crossed its threshold.
+        Restarting the browser doesn't free the memory of this process, so when the process
+        itself crossed MEMORY_MAX_RSS_MB the app stops, to be restarted by its supervisor.
+        """
+        try:
+            sample = self.memory.sample(getattr(self.__scraper, "pid", None))
+        except Exception as e:
+            print(f"Could not sample memory: {e}")
+            return
+        print(sample)
+        if self.memory.over_limit(sample):
+            print(f"Process memory over {self.memory.max_rss_mb:.0f} MB, stopping to be restarted")
+            self.shutdown(self.EXIT_MEMORY)
+        elif self.memory.should_recycle(sample):
+            print("Memory threshold crossed, recycling the browser")
+            self._reset_scraper()
+        
+    def run_worker(self, queue: JobQueue, departments: list[str | None], worker_id: str | None = None) -> None:
+        """
+        Runs only scraping jobs, one job per department, pulled from the job queue.
+        
+        Each department is scheduled once in the queue (other workers skip the duplicates)
+        and re-scheduled every SCRAPE_INTERVAL seconds after a successful scrape. Jobs are
+        leased, so if this worker crashes its department is picked up by another worker
+        when the lease expires. Every scrape publishes a 'classes_updated' event.
+        
+        Args:
+            queue (JobQueue): The queue shared by workers and bots.
+            departments (list[str | None]): Department values to scrape. None stands for the default department.
+            worker_id (str, optional): Identifier of this worker. Defaults to host and pid.
+        """
+        worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        for department in departments:
+            queue.enqueue("scrape", {"department": department}, key=f"scrape:{department}")
+        
+        while not self._stop_event.is_set():
+            if not self.breaker.allow():
+                self._stop_event.wait(self.breaker.remaining())
+                continue
+            job = queue.lease(worker_id, kind="scrape")
+            if job is None:
+                self._stop_event.wait(1)
+                continue
+            
+            department = job.payload["department"]
+            try:
+                self.scraper.access_portal()
+                self.scraper.access_classes(department)
+                data = self.scraper.update_classes_info()
+                changes = self.__db.upsert_classes(data)  # Raises, so a failed write is not recorded as a success
+                self.__db.archive_past_periods(self.__archiver, {c["Ano-Período"] for c in data})
+                self.archive(data, source=department or "default")
+                self._record_scrape(rows=len(data))
+                queue.publish("classes_updated", {"department": department, "rows": len(data), "changes": changes})
+                queue.complete(job, worker_id, repeat_after=self.SCRAPE_INTERVAL)
+                print(f"Department {department} updated at {datetime.now().strftime('%Y-%m-%d %H:%M')}\n")
+            except Exception as e:
+                print(f"Worker failed on department {department}: {e}")
+                queue.fail(job, worker_id, str(e), retry_after=self.retry.delay(job.attempts))
+                self._on_scrape_failure(e)
+                self._record_scrape(error=e)
+            finally:
+                self._check_memory()
+        
     def set_database(self) -> None:
         """
         Stores the scraped data into the database.
@@ -103,8 +335,38 @@ class App:
         df = self.df[self.df['code'] == code]
         print(df)
         
+    def start_api(self, port: int, host: str = "127.0.0.1", refresh: float = 5) -> None:
+        """
+        Starts the local HTTP/JSON API (see CatalogServer) in background threads.
+        The served snapshot is reloaded whenever the database's snapshot version changes.
+        
+        Args:
+            port (int): Port to listen on.
+            host (str): Address to listen on. Defaults to localhost only.
+            refresh (float): Seconds between two checks of the snapshot version.
+        """
+        from Api import CatalogServer
+        
+        self.api = CatalogServer(host, port).start()
+        
+        def refresh_loop():
+            while not self._stop_event.is_set():
+                try:
+                    self.api.refresh(self.__db)
+                except Exception as e:
+                    print(f"API could not refresh the catalog: {e}")
+                self._stop_event.wait(refresh)
+        
+        threading.Thread(target=refresh_loop, daemon=True, name="catalog-refresh").start()
+        
     def start_bot(self, TOKEN: str) -> None:
-        bot = SIGAAMOS_bot(TOKEN, self.__db).use_default_handlers()
+        from Telegram.telegram_bot import SIGAAMOS_bot
+        
+        bot = SIGAAMOS_bot(
+            TOKEN, self.__db,
+            base_url=os.getenv("BOT_API_URL"),
+            concurrent_updates=int(os.getenv("BOT_CONCURRENT_UPDATES", "1")),
+        ).use_default_handlers()
         bot.register_handlers()
         self.bot = bot
         
@@ -116,12 +378,43 @@ class App:
             asyncio.run(self.bot.run())  # Use asyncio.run to execute the bot's coroutine
         except Exception as e:
             print(f"Bot encountered an error: {e}")
+            
+    def run_frontend(self, TOKEN: str, queue: JobQueue) -> None:
+        """
+        Runs only the bot: serves commands from the shared database and notifies users
+        when workers publish 'classes_updated' events, without scraping in this process.
+        
+        Args:
+            TOKEN (str): Telegram bot token.
+            queue (JobQueue): The queue shared by workers and bots.
+        """
+        self.start_bot(TOKEN)
+        try:
+            self.bot.run(events=queue)
+        except Exception as e:
+            print(f"Bot encountered an error: {e}")
 
+    def shutdown(self, exit_code: int = 0) -> None:
+        """
+        Stops the scraping loops and the bot, so that main closes the app and exits.
+        
+        Args:
+            exit_code (int): Exit status of the process.
+        """
+        self.exit_code = exit_code
+        self._stop_event.set()
+        if threading.current_thread() is not threading.main_thread():
+            # The bot polls in the main thread and stops on SIGTERM
+            signal.raise_signal(signal.SIGTERM)
+        
     def close(self) -> None:
         """
         Signals threads to stop and waits for them to finish.
         """
         self._stop_event.set()  # Signal threads to stop
-        self.scraper_thread.join(timeout=5)  # Wait for scraper thread to finish with timeout
-        self.__scraper.quit()
+        if hasattr(self, "scraper_thread"):
+            self.scraper_thread.join(timeout=5)  # Wait for scraper thread to finish with timeout
+        self._reset_scraper()
+        if hasattr(self, "api"):
+            self.api.stop()
         self.__db.close()
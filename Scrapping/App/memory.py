@@ -0,0 +1,111 @@
+import os
+import tracemalloc
+from collections import deque
+from typing import NamedTuple
+
+from SIGAA.processes import rss_mb, tree_rss_mb
+
+
+class MemorySample(NamedTuple):
+    """
+    Memory use measured after a scraping cycle.
+
+    Attributes:
+        cycle (int): Number of the cycle.
+        rss_mb (float): Resident memory of this process.
+        browser_mb (float): Resident memory of geckodriver and its Firefox processes.
+        traced_mb (float): Python memory traced by tracemalloc, 0 when tracing is off.
+        top (list[str]): Lines whose allocations grew the most since the previous cycle.
+    """
+    cycle: int
+    rss_mb: float
+    browser_mb: float
+    traced_mb: float
+    top: list[str]
+
+    def __str__(self) -> str:
+        text = (f"cycle {self.cycle}: rss {self.rss_mb:.0f} MB, browser {self.browser_mb:.0f} MB, "
+                f"traced {self.traced_mb:.1f} MB")
+        return "\n  ".join([text, *self.top])
+
+
+class MemoryGuard:
+    """
+    Watches the memory of the long-running scraper.
+
+    After each cycle it samples the RSS of this process and of the browser process tree
+    and, when tracing is on, takes a tracemalloc snapshot and reports the lines whose
+    allocations grew since the previous one. `should_recycle` tells when the browser
+    crossed its threshold, and `over_limit` when this process did, which only a restart
+    of the process can fix.
+    """
+
+    def __init__(self, max_browser_mb: float | None = None, max_rss_mb: float | None = None,
+                 trace: bool | None = None, top: int = 5, history: int = 1000):
+        """
+        :param max_browser_mb: Recycle the browser above this RSS. Defaults to MEMORY_MAX_BROWSER_MB or 600.
+        :param max_rss_mb: Restart the process above this RSS. Defaults to MEMORY_MAX_RSS_MB, if set.
+        :param trace: Take tracemalloc snapshots. Defaults to MEMORY_TRACE=1.
+        :param top: Number of growing lines reported per cycle.
+        :param history: Number of samples kept.
+        """
+        self.max_browser_mb = max_browser_mb or float(os.getenv("MEMORY_MAX_BROWSER_MB", "600"))
+        if max_rss_mb is None and os.getenv("MEMORY_MAX_RSS_MB"):
+            max_rss_mb = float(os.getenv("MEMORY_MAX_RSS_MB"))
+        self.max_rss_mb = max_rss_mb
+        self.trace = os.getenv("MEMORY_TRACE") == "1" if trace is None else trace
+        self.top = top
+        self.samples: deque[MemorySample] = deque(maxlen=history)
+        self._cycles = 0
+        self._snapshot: tracemalloc.Snapshot | None = None
+        if self.trace and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def sample(self, browser_pid: int | None = None) -> MemorySample:
+        """
+        Measure the memory after a cycle.
+
+        :param browser_pid: PID of geckodriver, if a browser is running.
+        :return: The sample, also kept in `samples`.
+        """
+        top, traced = [], 0.0
+        if self.trace:
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            ])
+            traced = tracemalloc.get_traced_memory()[0] / 2**20
+            if self._snapshot is not None:
+                top = [str(stat) for stat in snapshot.compare_to(self._snapshot, "lineno")[:self.top]
+                       if stat.size_diff > 0]
+            self._snapshot = snapshot
+
+        self._cycles += 1
+        sample = MemorySample(
+            self._cycles,
+            rss_mb(os.getpid()),
+            tree_rss_mb(browser_pid) if browser_pid else 0.0,
+            traced,
+            top,
+        )
+        self.samples.append(sample)
+        return sample
+
+    def should_recycle(self, sample: MemorySample) -> bool:
+        """Whether the browser should be restarted after this sample."""
+        return sample.browser_mb > self.max_browser_mb
+
+    def over_limit(self, sample: MemorySample) -> bool:
+        """Whether this process uses more memory than allowed and should be restarted."""
+        return self.max_rss_mb is not None and sample.rss_mb > self.max_rss_mb
+
+    @staticmethod
+    def growth(values: list[float]) -> float:
+        """Least squares slope of a series, in units per cycle."""
+        count = len(values)
+        if count < 2:
+            return 0.0
+        mean_x, mean_y = (count - 1) / 2, sum(values) / count
+        covariance = sum((x - mean_x) * (y - mean_y) for x, y in enumerate(values))
+        variance = sum((x - mean_x) ** 2 for x in range(count))
+        return covariance / variance
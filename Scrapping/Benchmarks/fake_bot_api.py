@@ -0,0 +1,120 @@
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+class FakeBotAPI:
+    """
+    Minimal local stand-in for the Telegram Bot API, for benchmarks.
+
+    It answers every method with a successful response, builds plausible `Message`
+    objects for the send* methods and counts the calls it receives. Point the bot to
+    it with `SIGAAMOS_bot(..., base_url=api.url)` (or the BOT_API_URL env variable).
+    """
+
+    def __init__(self, latency: float = 0.0):
+        """
+        :param latency: Seconds to wait before answering each call, to mimic the network.
+        """
+        self.latency = latency
+        self.calls: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._message_ids = itertools.count(1)
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        """Base URL to give to the bot, the token and method are appended to it."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/bot"
+
+    def start(self) -> "FakeBotAPI":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeBotAPI":
+        return self.start()
+
+    def __exit__(self, *_) -> None:
+        self.stop()
+
+    def _result(self, method: str, params: dict):
+        """Result of a Bot API call."""
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+
+        if method == "getMe":
+            return {"id": 1, "is_bot": True, "first_name": "Fake", "username": "fake_bot"}
+        if method.startswith("send") or method.startswith("edit"):
+            chat_id = int(params.get("chat_id", 1))
+            return {
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "text": params.get("text", ""),
+            }
+        if method == "getUpdates":
+            return []
+        return True
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode(errors="replace")
+                try:
+                    params = json.loads(body) if body.startswith("{") else {
+                        key: values[-1] for key, values in parse_qs(body).items()
+                    }
+                except ValueError:
+                    params = {}
+                if api.latency:
+                    time.sleep(api.latency)
+
+                method = self.path.rsplit("/", 1)[-1]
+                payload = json.dumps({"ok": True, "result": api._result(method, params)}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST
+
+            def log_message(self, *_):
+                pass
+
+        return Handler
+
+
+def command_update(update_id: int, chat_id: int, text: str) -> dict:
+    """
+    Build the JSON of an Update carrying a command message, as sent by Telegram.
+
+    :param update_id: Id of the update.
+    :param chat_id: Id of the (private) chat sending the command.
+    :param text: Text of the message, starting with the command (e.g. '/search FGA0001').
+    :return: A dictionary accepted by `telegram.Update.de_json`.
+    """
+    command = text.split(" ", 1)[0]
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Bench"},
+            "text": text,
+            "entities": [{"type": "bot_command", "offset": 0, "length": len(command)}],
+        },
+    }
@@ -0,0 +1,271 @@
+"""
+Load test of the Telegram command path: replay synthetic /search, /warn and /watch
+updates at a fixed rate through the bot's registered handlers, against a local fake Bot API.
+
+Updates are put on the Application's update queue, as the poller does, at the given rate
+whether or not the bot keeps up, while a thread runs offline scraping cycles (App.cycle
+with classes_info.csv and random vacancies) on the same databases. Reports, per command,
+the latency from the arrival of the update to the end of its handler, the event-loop lag,
+and the time of the database calls made by the handlers, which grows when they wait on
+the scraper's writes. Compare with --no-scraper to see the contention alone.
+
+    python Scrapping/Benchmarks/load.py --rate 50 --duration 30
+    python Scrapping/Benchmarks/load.py --rate 200 --mix search=8,warn=2 --concurrent 8 --api-latency 0.05
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+SCRAPPING_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRAPPING_DIR))
+
+from Benchmarks.fake_bot_api import FakeBotAPI, command_update
+from Benchmarks.soak import OfflineScraper
+
+
+def summary(values: list[float]) -> str:
+    """p50/p95/p99/max of durations in seconds, in ms."""
+    if not values:
+        return "n=0"
+    if len(values) == 1:
+        p50 = p95 = p99 = values[0]
+    else:
+        quantiles = statistics.quantiles(values, n=100, method="inclusive")
+        p50, p95, p99 = quantiles[49], quantiles[94], quantiles[98]
+    return (f"n={len(values):<6} p50 {p50 * 1000:7.1f} ms  p95 {p95 * 1000:7.1f} ms  "
+            f"p99 {p99 * 1000:7.1f} ms  max {max(values) * 1000:7.1f} ms")
+
+
+def percentile(values: list[float], percent: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[percent - 1]
+
+
+class TimedDatabase:
+    """Wraps the bot's Database and times every call made by the handlers."""
+
+    def __init__(self, db, timings: dict[str, list[float]]):
+        self._db = db
+        self._timings = timings
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._db, name)
+        if not callable(attribute):
+            return attribute
+
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return attribute(*args, **kwargs)
+            finally:
+                self._timings.setdefault(name, []).append(time.perf_counter() - started)
+        return timed
+
+
+class CommandStream:
+    """
+    Generates the text of the commands sent by the simulated users.
+
+    A /warn registers a subject nobody else is watching (a subject can only be watched
+    by one chat), and the next /warn of the same chat removes it.
+    """
+
+    def __init__(self, mix: dict[str, int], codes: list[str], chats: int):
+        self.kinds, self.weights = list(mix), list(mix.values())
+        self.codes = codes
+        self.chats = chats
+        self._warned: dict[int, str] = {}
+        self._free = set(codes)
+
+    def next(self) -> tuple[int, str]:
+        chat_id = random.randint(1, self.chats)
+        kind = random.choices(self.kinds, self.weights)[0]
+        code = random.choice(self.codes)
+        if kind == "warn":
+            if chat_id in self._warned:
+                code = self._warned.pop(chat_id)
+                self._free.add(code)
+                return chat_id, f"/warn stop {code}"
+            if self._free:
+                code = self._free.pop()
+                self._warned[chat_id] = code
+            return chat_id, f"/warn {code}"
+        if kind == "watch":
+            return chat_id, f"/watch {code} vagas={random.randint(1, 3)}"
+        if kind == "search":
+            return chat_id, f"/search {code}"
+        return chat_id, f"/{kind}"
+
+
+def parse_mix(text: str) -> dict[str, int]:
+    mix = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        mix[kind.strip().lstrip("/")] = int(weight or 1)
+    return mix
+
+
+def run_scraper(app, stop: threading.Event, interval: float, cycles: list[float]) -> None:
+    """Scraping cycles on the app's databases until stopped, like App.run_scraper."""
+    while not stop.is_set():
+        started = time.perf_counter()
+        app.cycle()
+        cycles.append(time.perf_counter() - started)
+        stop.wait(interval)
+
+
+async def load(app, args) -> dict:
+    """Send the updates and collect the timings."""
+    from telegram import Update
+
+    application = app.bot.bot
+    results = {"latency": {}, "handler": {}, "db": {}, "lag": [], "errors": {}, "cycles": []}
+    arrivals: dict[int, float] = {}
+
+    def timed(callback, command):
+        async def handler(update, context):
+            started = time.perf_counter()
+            try:
+                await callback(update, context)
+            finally:
+                ended = time.perf_counter()
+                results["handler"].setdefault(command, []).append(ended - started)
+                results["latency"].setdefault(command, []).append(ended - arrivals.pop(update.update_id, started))
+        return handler
+
+    for handler in app.bot.handlers:
+        if hasattr(handler, "commands"):
+            handler.callback = timed(handler.callback, "/" + min(handler.commands))
+
+    async def on_error(update, context):
+        name = type(context.error).__name__
+        results["errors"][name] = results["errors"].get(name, 0) + 1
+
+    application.add_error_handler(on_error)
+    app.bot.db = TimedDatabase(app.bot.db, results["db"])
+
+    async def ticker(stop: asyncio.Event, interval: float = 0.01):
+        while not stop.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            results["lag"].append(max(0.0, time.perf_counter() - started - interval))
+
+    stream = CommandStream(parse_mix(args.mix), sorted({c["Código"] for c in OfflineScraper.CLASSES}), args.chats)
+    total = int(args.rate * args.duration)
+    stop_ticker = asyncio.Event()
+    stop_scraper = threading.Event()
+    scraper = threading.Thread(
+        target=run_scraper, args=(app, stop_scraper, args.scrape_interval, results["cycles"]), daemon=True,
+    )
+
+    await application.initialize()
+    await application.start()
+    lag_task = asyncio.create_task(ticker(stop_ticker))
+    if not args.no_scraper:
+        scraper.start()
+
+    started = time.perf_counter()
+    for update_id in range(1, total + 1):
+        delay = started + (update_id - 1) / args.rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        chat_id, text = stream.next()
+        arrivals[update_id] = time.perf_counter()
+        await application.update_queue.put(Update.de_json(command_update(update_id, chat_id, text), application.bot))
+    sent = time.perf_counter()
+
+    # Let the bot drain the queue
+    deadline = sent + args.drain_timeout
+    while arrivals and time.perf_counter() < deadline:
+        await asyncio.sleep(0.05)
+    results["elapsed"] = time.perf_counter() - started
+    results["sent"] = sent - started
+    results["pending"] = len(arrivals)
+
+    stop_scraper.set()
+    stop_ticker.set()
+    await lag_task
+    if scraper.is_alive():
+        await asyncio.to_thread(scraper.join)
+    await application.stop()
+    await application.shutdown()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=50, help="updates per second")
+    parser.add_argument("--duration", type=float, default=20, help="seconds of load")
+    parser.add_argument("--mix", default="search=6,warn=3,watch=1", help="weights of the commands")
+    parser.add_argument("--chats", type=int, default=500, help="number of simulated users")
+    parser.add_argument("--concurrent", type=int, default=1, help="updates handled at the same time by the bot")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="seconds per Bot API call")
+    parser.add_argument("--scrape-interval", type=float, default=1.0, help="seconds between scraping cycles")
+    parser.add_argument("--no-scraper", action="store_true", help="don't scrape during the load")
+    parser.add_argument("--drain-timeout", type=float, default=60, help="seconds to wait for queued updates")
+    parser.add_argument("--max-p99-ms", type=float, help="fail if the p99 latency of a command is higher")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    with FakeBotAPI(latency=args.api_latency) as api, tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        os.environ.update(
+            BOT_API_URL=api.url,
+            BOT_CONCURRENT_UPDATES=str(args.concurrent),
+            SNAPSHOT_DIR=os.path.join(workdir, "snapshots"),
+        )
+
+        from App import App
+
+        app = App(scraper_factory=OfflineScraper)
+        app.retry.attempts = 1
+        # The handlers, the scraper and the app all print, keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            app.cycle()
+            app.start_bot("123:LOAD")
+            results = asyncio.run(load(app, args))
+        app.close()
+        os.chdir(SCRAPPING_DIR)
+
+    handled = sum(len(values) for values in results["latency"].values())
+    print(f"{handled} updates handled in {results['elapsed']:.1f} s "
+          f"({args.rate:g}/s offered for {results['sent']:.1f} s, {handled / results['elapsed']:.1f}/s handled, "
+          f"{args.concurrent} at a time, {results['pending']} still queued), "
+          f"{api.calls.get('sendMessage', 0)} messages sent")
+    if results["cycles"]:
+        print(f"scraping cycles: {summary(results['cycles'])}")
+
+    print("\nlatency, arrival to end of the handler:")
+    for command, values in sorted(results["latency"].items()):
+        print(f"  {command:<8} {summary(values)}")
+    print("handler time:")
+    for command, values in sorted(results["handler"].items()):
+        print(f"  {command:<8} {summary(values)}")
+    print(f"event-loop lag: {summary(results['lag'])}")
+    print("database calls from the handlers:")
+    for name, values in sorted(results["db"].items(), key=lambda item: -sum(item[1])):
+        print(f"  {name:<18} {summary(values)}  total {sum(values):.2f} s")
+    print("errors: " + (", ".join(f"{name} x{count}" for name, count in results["errors"].items()) or "none"))
+
+    if args.max_p99_ms is not None:
+        slow = [command for command, values in results["latency"].items()
+                if percentile(values, 99) * 1000 > args.max_p99_ms]
+        if slow or results["pending"]:
+            print(f"FAILED: p99 latency over {args.max_p99_ms:g} ms for {', '.join(slow) or 'queued updates'}")
+            sys.exit(1)
+        print(f"OK: p99 latency under {args.max_p99_ms:g} ms")
+
+
+if __name__ == "__main__":
+    main()
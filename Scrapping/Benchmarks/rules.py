@@ -0,0 +1,111 @@
+"""
+Watch rule benchmark: match a cycle of change events against many /watch rules.
+
+Rules and events are generated from the classes in classes_info.csv (or a synthetic
+catalog if it is missing). Compares the indexed RuleIndex with the naive check of
+every rule against every event.
+
+    python Scrapping/Benchmarks/rules.py --rules 50000 --events 300
+"""
+import argparse
+import csv
+import random
+import sys
+import time
+from pathlib import Path
+
+SCRAPPING_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRAPPING_DIR))
+
+from Telegram.rules import RuleIndex, WatchRule, name_tokens, schedule_slots
+
+
+def load_catalog() -> list[dict]:
+    """Classes as change events, from classes_info.csv or generated."""
+    path = SCRAPPING_DIR.parent / "classes_info.csv"
+    if path.exists():
+        with open(path, encoding="utf-8") as file:
+            return [
+                {
+                    "subject": row["Matéria"], "code": row["Código"], "num": row["N_o"],
+                    "period": row["Ano-Período"], "professor": row["Docente"], "schedule": row["Horário"],
+                    "available_spots": int(row["Qtde Vagas Disponíveis"]) or 1, "local": row["Local"],
+                }
+                for row in csv.DictReader(file)
+            ]
+    return [
+        {
+            "subject": f"MATERIA {code}", "code": f"FGA{code:04d}", "num": f"{num:02d}", "period": "2025.1",
+            "professor": f"PROFESSOR{code % 40} SOBRENOME{code % 17} (60h)",
+            "schedule": f"{random.choice(['24', '35', '46'])}{random.choice('MTN')}{random.choice(['12', '34'])}",
+            "available_spots": random.randint(1, 10), "local": "FGA - S1",
+        }
+        for code in range(200) for num in range(1, 3)
+    ]
+
+
+def random_rules(catalog: list[dict], count: int) -> list[WatchRule]:
+    """Rules on the catalog's codes and professors, with a mix of the other predicates."""
+    professors = sorted({token for event in catalog for token in name_tokens(event["professor"])})
+    rules = []
+    for rule_id in range(count):
+        event = random.choice(catalog)
+        by_code = random.random() < 0.8
+        rules.append(WatchRule(
+            rule_id,
+            chat_id=random.randint(1, count // 2),
+            code=event["code"] if by_code else None,
+            professor=None if by_code and random.random() < 0.7 else random.choice(professors),
+            num=event["num"].lstrip("0") if random.random() < 0.3 else None,
+            min_seats=random.randint(1, 5),
+            busy=schedule_slots(random.choice(["", "24M12", "35T45", "46N12"])),
+        ))
+    return rules
+
+
+def naive_match(rules: list[WatchRule], events: list[dict]) -> dict[int, list[dict]]:
+    matches: dict[int, list[dict]] = {}
+    for event in events:
+        tokens, slots = name_tokens(event["professor"]), schedule_slots(event["schedule"])
+        notified = set()
+        for rule in rules:
+            if rule.chat_id not in notified and rule.matches(event, tokens, slots):
+                notified.add(rule.chat_id)
+                matches.setdefault(rule.chat_id, []).append(event)
+    return matches
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rules", type=int, default=50_000)
+    parser.add_argument("--events", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    catalog = load_catalog()
+    rules = random_rules(catalog, args.rules)
+    events = random.choices(catalog, k=args.events)
+
+    started = time.perf_counter()
+    index = RuleIndex(rules)
+    built = time.perf_counter()
+    matches = index.match(events)
+    matched = time.perf_counter()
+    print(f"{args.rules} rules, {args.events} events ({len(catalog)} classes in the catalog)")
+    print(f"index build: {(built - started) * 1000:.1f} ms")
+    print(f"indexed match: {(matched - built) * 1000:.1f} ms "
+          f"({(matched - built) / args.events * 1e6:.0f} us/event), "
+          f"{sum(len(events) for events in matches.values())} notifications for {len(matches)} chats")
+
+    # The naive match is too slow to run on every event, time a sample and extrapolate
+    sample = events[:max(1, args.events // 30)]
+    started = time.perf_counter()
+    expected = naive_match(rules, sample)
+    naive = (time.perf_counter() - started) / len(sample)
+    print(f"naive match: {naive * 1e6:.0f} us/event (estimated {naive * args.events * 1000:.0f} ms for the cycle)")
+    assert expected == index.match(sample), "indexed and naive matches differ"
+
+
+if __name__ == "__main__":
+    main()
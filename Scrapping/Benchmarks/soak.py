@@ -0,0 +1,117 @@
+"""
+Soak test: run many offline scraping cycles and check that memory stays flat.
+
+Each cycle goes through App.cycle with an offline scraper replaying classes_info.csv
+with random vacancies: database upsert, Parquet archive, /warn and /watch notifications
+(sent to a local fake Bot API) and the memory guard. After a warm-up, the growth of the
+RSS (and, with --trace, of the memory traced by tracemalloc) must stay under the given
+limits. Tracing makes each cycle much slower, use it with fewer cycles to find a leak.
+
+    python Scrapping/Benchmarks/soak.py --cycles 300
+    python Scrapping/Benchmarks/soak.py --cycles 30 --warmup 5 --trace
+"""
+import argparse
+import asyncio
+import contextlib
+import copy
+import csv
+import io
+import os
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+SCRAPPING_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRAPPING_DIR))
+
+from Benchmarks.fake_bot_api import FakeBotAPI
+
+
+class OfflineScraper:
+    """Stands in for SIGAA_Scraper, returning classes_info.csv with random vacancies."""
+
+    with open(SCRAPPING_DIR.parent / "classes_info.csv", encoding="utf-8") as file:
+        CLASSES = list(csv.DictReader(file))
+
+    pid = None
+
+    def access_portal(self):
+        pass
+
+    def access_classes(self, department=None):
+        pass
+
+    def update_classes_info(self) -> list[dict]:
+        data = copy.deepcopy(self.CLASSES)
+        for class_info in data:
+            offered = int(class_info["Qtde Vagas Ofertadas"])
+            occupied = random.randint(max(0, offered - 5), offered)
+            class_info["Qtde Vagas Ocupadas"] = str(occupied)
+            class_info["Qtde Vagas Disponíveis"] = offered - occupied
+        return data
+
+    def quit(self):
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cycles", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=30)
+    parser.add_argument("--max-traced-growth-kb", type=float, default=20, help="per cycle")
+    parser.add_argument("--max-rss-growth-kb", type=float, default=100, help="per cycle")
+    parser.add_argument("--trace", action="store_true", help="report the lines that allocate with tracemalloc")
+    args = parser.parse_args()
+
+    random.seed(0)
+    with FakeBotAPI() as api, tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        os.environ.update(BOT_API_URL=api.url, SNAPSHOT_DIR=os.path.join(workdir, "snapshots"))
+
+        from App import App
+        from App.memory import MemoryGuard
+
+        app = App(scraper_factory=OfflineScraper)
+        app.retry.attempts = 1
+        app.memory = MemoryGuard(trace=args.trace, top=3)
+        app.start_bot("123:SOAK")
+
+        # Subscribers on a few subjects, through /warn items and /watch rules
+        db = app.bot.db
+        codes = sorted({class_info["Código"] for class_info in OfflineScraper.CLASSES})
+        for chat_id, code in enumerate(random.sample(codes, 20), start=1):
+            db.add_chat(chat_id)
+            db.add_item(chat_id, code)
+            db.add_rule(chat_id, code=code, min_seats=2)
+
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(app.bot.bot.initialize())
+
+        for cycle in range(1, args.cycles + 1):
+            with contextlib.redirect_stdout(io.StringIO()):
+                app.cycle(loop)
+            if cycle % max(1, args.cycles // 10) == 0:
+                print(str(app.memory.samples[-1]))
+
+        loop.run_until_complete(app.bot.bot.shutdown())
+        loop.close()
+        app.close()
+        os.chdir(SCRAPPING_DIR)
+
+    samples = list(app.memory.samples)[args.warmup:]
+    traced = MemoryGuard.growth([sample.traced_mb for sample in samples]) * 1024
+    rss = MemoryGuard.growth([sample.rss_mb for sample in samples]) * 1024
+    print(f"\n{len(samples)} cycles after warm-up, {api.calls.get('sendMessage', 0)} messages sent")
+    print(f"traced memory growth: {traced:.2f} KB/cycle (limit {args.max_traced_growth_kb})")
+    print(f"RSS growth: {rss:.2f} KB/cycle (limit {args.max_rss_growth_kb})")
+
+    if traced > args.max_traced_growth_kb or rss > args.max_rss_growth_kb:
+        print("FAILED: memory is not flat")
+        sys.exit(1)
+    print("OK: memory is flat")
+
+
+if __name__ == "__main__":
+    main()
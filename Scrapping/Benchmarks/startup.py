@@ -0,0 +1,100 @@
+"""
+Startup benchmark: time from process start to the first handled Telegram update.
+
+Each run spawns a fresh interpreter that imports the app, sets it up in fast-start mode
+against a local fake Bot API and handles a synthetic /start update, so import costs are
+measured cold. The previous snapshot (classes.db/chats.db) is copied into a temporary
+working directory so the run doesn't touch the real databases.
+
+    python Scrapping/Benchmarks/startup.py --runs 5
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRAPPING_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRAPPING_DIR))
+
+from Benchmarks.fake_bot_api import FakeBotAPI, command_update
+
+
+def child() -> None:
+    """Runs inside the spawned interpreter and prints its timings as JSON."""
+    import asyncio
+
+    started = time.perf_counter()
+    from App import App
+    imported = time.perf_counter()
+
+    app = App()
+    app.setup("123:BENCH", fast_start=True)
+    ready = time.perf_counter()
+
+    async def first_update():
+        from telegram import Update
+
+        application = app.bot.bot
+        await application.initialize()
+        update = Update.de_json(command_update(1, 1, "/start"), application.bot)
+        await application.process_update(update)
+        await application.shutdown()
+
+    asyncio.run(first_update())
+    handled = time.perf_counter()
+
+    print(json.dumps({
+        "import": imported - started,
+        "setup": ready - imported,
+        "first_update": handled - ready,
+        "selenium_imported": "selenium" in sys.modules,
+        "pandas_imported": "pandas" in sys.modules,
+    }))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child()
+        return
+
+    totals = []
+    with FakeBotAPI() as api, tempfile.TemporaryDirectory() as workdir:
+        for db in ("classes.db", "chats.db"):
+            if (SCRAPPING_DIR.parent / db).exists():
+                shutil.copy(SCRAPPING_DIR.parent / db, workdir)
+        env = dict(os.environ, BOT_API_URL=api.url)
+
+        for run in range(args.runs):
+            started = time.perf_counter()
+            output = subprocess.run(
+                [sys.executable, __file__, "--child"],
+                cwd=workdir, env=env, capture_output=True, text=True, check=True,
+            ).stdout
+            total = time.perf_counter() - started
+            totals.append(total)
+
+            timings = json.loads(output.strip().splitlines()[-1])
+            print(
+                f"run {run + 1}: total {total * 1000:.0f} ms "
+                f"(import {timings['import'] * 1000:.0f} ms, setup {timings['setup'] * 1000:.0f} ms, "
+                f"first update {timings['first_update'] * 1000:.0f} ms, "
+                f"selenium imported: {timings['selenium_imported']}, pandas imported: {timings['pandas_imported']})"
+            )
+
+    print(f"time to first handled update: median {statistics.median(totals) * 1000:.0f} ms, "
+          f"max {max(totals) * 1000:.0f} ms over {len(totals)} runs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import os
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+
+
+def resolve_url(explicit: str | None, env_var: str, default: str) -> str:
+    """
+    Resolve the storage URL for one of the databases.
+
+    The lookup order is: the explicit argument, the dedicated environment variable
+    (e.g. ``CLASSES_DB_URL``), the shared ``DATABASE_URL`` and finally the SQLite default.
+
+    :param explicit: URL passed directly by the caller, if any.
+    :param env_var: Name of the environment variable dedicated to this database.
+    :param default: URL used when nothing else is configured.
+    :return: The SQLAlchemy URL to connect to.
+    """
+    return explicit or os.getenv(env_var) or os.getenv("DATABASE_URL") or default
+
+
+def backend_name(engine: Engine) -> str:
+    """
+    Name of the backend behind an engine ('sqlite', 'postgresql', ...).
+    """
+    return engine.dialect.name
+
+
+def make_engine(url: str) -> Engine:
+    """
+    Create an engine tuned for the backend selected by the URL.
+
+    - SQLite keeps a single file per database, but runs in WAL mode with a busy timeout,
+      so the scraper thread can write while the bot reads.
+    - PostgreSQL uses a pre-pinged connection pool, sized through ``DB_POOL_SIZE``,
+      ``DB_MAX_OVERFLOW`` and ``DB_POOL_RECYCLE``, so several scraper workers and bot
+      instances can share the same database.
+
+    :param url: SQLAlchemy URL of the database.
+    :return: The configured engine.
+    """
+    backend = make_url(url).get_backend_name()
+
+    if backend == "sqlite":
+        engine = create_engine(url, connect_args={"timeout": 30})
+
+        @event.listens_for(engine, "connect")
+        def _set_sqlite_pragmas(dbapi_connection, _):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.close()
+
+        return engine
+
+    if backend == "postgresql":
+        return create_engine(
+            url,
+            pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+            pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+            pool_pre_ping=True,
+        )
+
+    return create_engine(url, pool_pre_ping=True)
@@ -1,11 +1,20 @@
-from sqlalchemy import create_engine
+from __future__ import annotations
+
+from sqlalchemy import Integer, String, cast, func, select
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.exc import IntegrityError
-import pandas as pd
 
-from .models import Base, Chat, Item, Subject, Class_info
+from .models import Base, Chat, Item, Rule, Subject, Class_info, Meta
+from .backend import backend_name, make_engine, resolve_url
+
+import csv
+import io
+
+from typing import TYPE_CHECKING, Final, Iterable, Self
 
-from typing import Final, Self
+if TYPE_CHECKING:
+    # pandas is imported on first query, keeping the bot startup fast
+    import pandas as pd
+    from .snapshots import SnapshotArchiver
 
 class Database:
     """Database handler for managing chat, item, subject, and class information data."""
@@ -13,39 +22,62 @@ class Database:
     USER_DB: Final = "sqlite:///chats.db"
     CLASSES_DB: Final = "sqlite:///classes.db"
 
-    def __init__(self):
+    # Columns that identify a class row, matching the '_info_uc' unique constraint
+    CLASS_KEY: Final = ("N_o", "codigo", "docente", "ano_periodo", "horario")
+
+    def __init__(self, user_db: str | None = None, classes_db: str | None = None):
         """
         Initialize the database connections and create tables if they don't exist.
         
-        This method sets up two SQLite databases: one for user-related data (chats and items)
+        This method sets up two databases: one for user-related data (chats and items)
         and another for class-related data (subjects and class information).
+        Both default to SQLite files, but can point to any SQLAlchemy URL (e.g. PostgreSQL)
+        through the arguments or the USER_DB_URL, CLASSES_DB_URL and DATABASE_URL
+        environment variables. When both URLs are the same a single pooled engine is shared.
+        
+        :param user_db: URL of the user database.
+        :param classes_db: URL of the classes database.
         """
-        self._user_engine = create_engine(self.USER_DB)
-        self._class_engine = create_engine(self.CLASSES_DB)
+        self.user_url = resolve_url(user_db, "USER_DB_URL", self.USER_DB)
+        self.classes_url = resolve_url(classes_db, "CLASSES_DB_URL", self.CLASSES_DB)
+        self._user_engine = make_engine(self.user_url)
+        if self.classes_url == self.user_url:
+            self._class_engine = self._user_engine
+        else:
+            self._class_engine = make_engine(self.classes_url)
         Base.metadata.create_all(self._user_engine)
         Base.metadata.create_all(self._class_engine)
+        # create_all skips the indexes of tables that already exist
+        for index in Class_info.__table__.indexes:
+            index.create(self._class_engine, checkfirst=True)
+        self._widen_chat_ids()
         self._userSession = sessionmaker(bind=self._user_engine)
         self._classSession = sessionmaker(bind=self._class_engine)
         
+    def _widen_chat_ids(self) -> None:
+        """
+        Convert the chat ID columns created as 32 bit INTEGER on PostgreSQL by earlier
+        versions to BIGINT, as Telegram chat IDs don't fit. SQLite integers are already 64 bit.
+        """
+        if backend_name(self._user_engine) != "postgresql":
+            return
+        with self._user_engine.begin() as conn:
+            narrow = conn.exec_driver_sql(
+                "SELECT table_name FROM information_schema.columns "
+                "WHERE table_schema = current_schema() AND column_name = 'chat_id' "
+                "AND table_name IN ('chats', 'items', 'rules') AND data_type = 'integer'"
+            ).scalars().all()
+            for table in narrow:
+                conn.exec_driver_sql(f'ALTER TABLE "{table}" ALTER COLUMN chat_id TYPE BIGINT')
+
     def create(self, data: list[dict]) -> Self:
-        from pathlib import Path
-        
         """
-        Check if the database files exist. If not, create them and populate with the provided data.
+        Populate the classes database with the provided data.
         
         :param data: List of dictionaries containing the data to populate the database.
         """
-        user_db_path = Path(self.USER_DB.replace("sqlite:///", ""))
-        classes_db_path = Path(self.CLASSES_DB.replace("sqlite:///", ""))
-        
         try:
-            for class_info in data:
-                subject = {
-                    "Matéria": class_info["Matéria"],
-                    "Código": class_info["Código"]
-                }
-                self._add_classes(subject, class_info)
-                
+            self.upsert_classes(data)
             print("Data saved in database")
         except Exception as e:
             print(e)
@@ -87,82 +119,7 @@ class Database:
         session.commit()
         session.close()
         
-    def _add_classes(self, subject: dict, class_info: dict):
-        """
-        Add subject and class information to the classes database.
-        
-        :param subject: Dictionary containing the subject name and code.
-        :param class_info: Dictionary containing class information
-            (year_semester, teacher, schedule, offered_vacancies, occupied_vacancies,
-            available_vacancies, location).
-        """
-        self._add_subject(subject["Matéria"], subject["Código"])
-        self._add_classes_info(subject["Código"], class_info["N_o"], class_info["Ano-Período"], class_info["Docente"], 
-                               class_info["Horário"], class_info["Qtde Vagas Ofertadas"], 
-                               class_info["Qtde Vagas Ocupadas"], class_info["Qtde Vagas Disponíveis"], 
-                               class_info["Local"]
-                            )        
-        
-    def _add_subject(self, name: str, code: str):
-        """
-        Add a subject to the subjects table in the classes database if it doesn't already exist.
-        
-        :param name: Name of the subject.
-        :param code: Unique code of the subject.
-        """
-        session = self._classSession()
-        try:
-            # Attempt to add the subject directly
-            subject = Subject(subject=name, codigo=code)
-            session.add(subject)
-            session.commit()
-        except IntegrityError:
-            # If the subject already exists, rollback the session
-            session.rollback()
-        finally:
-            session.close()
-        
-    def _add_classes_info(self, subject_code: str, class_number:str, year_semester: str, teacher: str, schedule: str, 
-                          offered_vacancies: int, occupied_vacancies: int, available_vacancies: int, location: str):
-        """
-        Add class information to the classes table in the classes database.
-        
-        :param subject_code: Code of the subject associated with the class.
-        :param year_semester: Year and semester of the class (e.g., "2023.1").
-        :param teacher: Name of the teacher for the class.
-        :param schedule: Schedule of the class.
-        :param offered_vacancies: Total number of offered vacancies.
-        :param occupied_vacancies: Number of occupied vacancies.
-        :param available_vacancies: Number of available vacancies.
-        :param location: Location where the class is held.
-        """
-        if not all(isinstance(arg, int) for arg in [offered_vacancies, occupied_vacancies, available_vacancies]):
-            try:
-                offered_vacancies = int(offered_vacancies)
-                occupied_vacancies = int(occupied_vacancies)
-                available_vacancies = int(available_vacancies)
-            except ValueError:
-                raise ValueError("offered_vacancies, occupied_vacancies, and available_vacancies must be integers.")
-        
-        session = self._classSession()
-        try:
-            class_info = Class_info(codigo=subject_code, 
-                                    N_o=class_number,
-                                    ano_periodo=year_semester, 
-                                    docente=teacher, 
-                                    horario=schedule, 
-                                    vagas_ofertadas=offered_vacancies, 
-                                    vagas_ocupadas=occupied_vacancies, 
-                                    vagas_disponiveis=available_vacancies, 
-                                    local=location)
-            session.add(class_info)
-            session.commit()
-        except IntegrityError as e:
-            session.rollback()
-        finally:
-            session.close()
-            
-    def filter(self, by: str = 'availability') -> pd.DataFrame:
+    def filter(self, by: str = 'availability', period: str | None = None) -> pd.DataFrame:
         """
         Filters and retrieves class information from the database based on the specified criteria.
         Args:
@@ -170,6 +127,7 @@ class Database:
                 - 'availability': Filters by available spots and excludes 'offered_spots' and 'occupied_spots' columns.
                 - 'occupied': Filters by occupied spots and excludes 'offered_spots' and 'available_spots' columns.
                 - 'offered': Filters by offered spots and excludes 'available_spots' and 'occupied_spots' columns.
+            period (str, optional): The period to retrieve, see get_df. Defaults to the active period.
         Returns:
             pd.DataFrame: A Pandas DataFrame containing the filtered class information with the following columns:
                 - subject: The name of the subject.
@@ -183,9 +141,11 @@ class Database:
         Raises:
             Exception: Prints the exception message if an error occurs during the query or data processing.
         """
+        import pandas as pd
+
         try:
             # Retrieve all data using get_df
-            df = self.get_df()
+            df = self.get_df(period)
 
             # Drop columns based on the filter criterion
             if by == 'availability':
@@ -201,9 +161,13 @@ class Database:
             print(e)
             return pd.DataFrame()
             
-    def get_df(self) -> pd.DataFrame:
+    def get_df(self, period: str | None = None) -> pd.DataFrame:
         """
-        Queries the database and returns all class information as a Pandas DataFrame.
+        Queries the database and returns the class information of a period as a Pandas DataFrame.
+
+        Args:
+            period (str, optional): The period to retrieve (e.g. "2025.1"), or "all" for every
+                period still in the database. Defaults to the active period.
 
         Returns:
             pd.DataFrame: A DataFrame containing all class information with the following columns:
@@ -218,8 +182,12 @@ class Database:
                 - available_spots: The number of available spots.
                 - local: The location of the class.
         """
+        import pandas as pd
+
+        columns = ["subject", "code", "num", "period", "professor", "schedule",
+                   "offered_spots", "occupied_spots", "available_spots", "local"]
         session = self._classSession()
-        df = pd.DataFrame()
+        df = pd.DataFrame(columns=columns)
 
         try:
             # Query the database to join Class_info and Subject tables
@@ -227,6 +195,9 @@ class Database:
                 session.query(Class_info, Subject)
                 .join(Subject, Class_info.codigo == Subject.codigo)
             )
+            period = period or self.active_period()
+            if period != "all":
+                query = query.filter(Class_info.ano_periodo == period)
 
             # Convert the query results to a list of dictionaries
             data = [
@@ -246,13 +217,153 @@ class Database:
             ]
 
             # Convert the data to a Pandas DataFrame
-            df = pd.DataFrame(data)
+            df = pd.DataFrame(data, columns=columns)
         except Exception as e:
             print(e)
         finally:
             session.close()
             return df
 
+    def active_period(self) -> str | None:
+        """
+        The period served by default: the ACTIVE_PERIOD environment variable if set and
+        present in the database, otherwise the latest period in the database.
+
+        Returns:
+            str | None: The period (e.g. "2025.1"), None if the database is empty.
+        """
+        import os
+
+        session = self._classSession()
+        try:
+            override = os.getenv("ACTIVE_PERIOD")
+            if override and session.query(Class_info.id).filter(Class_info.ano_periodo == override).first():
+                return override
+            return session.query(func.max(Class_info.ano_periodo)).scalar()
+        finally:
+            session.close()
+
+    def archive_past_periods(self, archiver: SnapshotArchiver, current: Iterable[str] = ()) -> int:
+        """
+        Move the classes of the periods before the newest one in the database to cold
+        storage, keeping the class_info table small.
+
+        The cutoff is the newest stored period, not ACTIVE_PERIOD, which may be ahead of
+        what SIGAA lists, and the periods of the current scrape are never archived:
+        archiving them would make all their classes look new on the next upsert.
+
+        Args:
+            archiver (SnapshotArchiver): Archive receiving the past periods.
+            current (Iterable[str], optional): Periods of the scrape just stored.
+
+        Returns:
+            int: The number of archived classes.
+        """
+        current = set(current)
+        session = self._classSession()
+        archived = 0
+        try:
+            newest = session.query(func.max(Class_info.ano_periodo)).scalar()
+            if newest is None:
+                return 0
+            past = [period for (period,) in session.query(Class_info.ano_periodo)
+                    .filter(Class_info.ano_periodo < newest).distinct()
+                    if period not in current]
+            for period in past:
+                query = (
+                    session.query(Class_info, Subject)
+                    .join(Subject, Class_info.codigo == Subject.codigo)
+                    .filter(Class_info.ano_periodo == period)
+                )
+                records = [
+                    {
+                        "Matéria": subject.subject,
+                        "Código": class_info.codigo,
+                        "N_o": class_info.N_o,
+                        "Ano-Período": class_info.ano_periodo,
+                        "Docente": class_info.docente,
+                        "Horário": class_info.horario,
+                        "Qtde Vagas Ofertadas": class_info.vagas_ofertadas,
+                        "Qtde Vagas Ocupadas": class_info.vagas_ocupadas,
+                        "Qtde Vagas Disponíveis": class_info.vagas_disponiveis,
+                        "Local": class_info.local,
+                    }
+                    for class_info, subject in query
+                ]
+                # Write the cold copy before deleting, so a failure never loses data
+                archiver.archive_period(period, records)
+                session.query(Class_info).filter(Class_info.ano_periodo == period).delete()
+                session.commit()
+                archived += len(records)
+                print(f"Archived {len(records)} classes of {period}")
+        except Exception as e:
+            session.rollback()
+            print(f"Error archiving past periods: {e}")
+        finally:
+            session.close()
+        return archived
+
+    def snapshot_version(self) -> int:
+        """
+        Version of the classes data, increased every time a snapshot is stored.
+        Used to key caches built from the data.
+
+        Returns:
+            int: The current version, 0 if no snapshot was stored yet.
+        """
+        session = self._classSession()
+        try:
+            meta = session.get(Meta, "snapshot_version")
+            return int(meta.value) if meta else 0
+        except Exception as e:
+            print(f"Error reading snapshot version: {e}")
+            return 0
+        finally:
+            session.close()
+
+    def set_meta(self, values: dict[str, str]) -> None:
+        """
+        Store metadata entries (e.g. the last successful scrape), replacing previous values.
+
+        :param values: Entries to store, by key.
+        """
+        session = self._classSession()
+        try:
+            for key, value in values.items():
+                session.merge(Meta(key=key, value=str(value)))
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            print(f"Error saving metadata: {e}")
+        finally:
+            session.close()
+
+    def get_meta(self) -> dict[str, str]:
+        """
+        Retrieve all metadata entries.
+
+        Returns:
+            dict[str, str]: The entries by key.
+        """
+        session = self._classSession()
+        try:
+            return {meta.key: meta.value for meta in session.query(Meta)}
+        except Exception as e:
+            print(f"Error reading metadata: {e}")
+            return {}
+        finally:
+            session.close()
+
+    def has_classes(self) -> bool:
+        """
+        Checks whether the classes database holds any class, without loading it.
+        """
+        session = self._classSession()
+        try:
+            return session.query(Class_info.id).first() is not None
+        finally:
+            session.close()
+
     @property
     def sessions(self) -> tuple[sessionmaker[Session], sessionmaker[Session]]:
         """
@@ -273,58 +384,172 @@ class Database:
         self._user_engine.dispose()
         self._class_engine.dispose()
 
-    def update_classes(self, data: list[dict]):
+    def update_classes(self, data: list[dict]) -> list[dict]:
         """
         Update the classes data in the database based on the provided data.
 
         :param data: List of dictionaries containing the updated class information.
+        :return: The change events, see upsert_classes.
         """
-        session = self._classSession()
         try:
-            for class_info in data:
-                # Update or insert the subject
-                subject = session.query(Subject).filter_by(codigo=class_info["Código"]).first()
-                if not subject:
-                    subject = Subject(subject=class_info["Matéria"], codigo=class_info["Código"])
-                    session.add(subject)
-                    session.commit()
-
-                # Update or insert the class information
-                class_record = session.query(Class_info).filter_by(
-                    codigo=class_info["Código"],
-                    N_o=class_info["N_o"],
-                    ano_periodo=class_info["Ano-Período"],
-                    docente=class_info["Docente"],
-                    horario=class_info["Horário"]
-                ).first()
-
-                if class_record:
-                    # Update existing record
-                    class_record.vagas_ofertadas = class_info["Qtde Vagas Ofertadas"]
-                    class_record.vagas_ocupadas = class_info["Qtde Vagas Ocupadas"]
-                    class_record.vagas_disponiveis = class_info["Qtde Vagas Disponíveis"]
-                    class_record.local = class_info["Local"]
-                else:
-                    # Insert new record
-                    new_class = Class_info(
-                        codigo=class_info["Código"],
-                        N_o=class_info["N_o"],
-                        ano_periodo=class_info["Ano-Período"],
-                        docente=class_info["Docente"],
-                        horario=class_info["Horário"],
-                        vagas_ofertadas=class_info["Qtde Vagas Ofertadas"],
-                        vagas_ocupadas=class_info["Qtde Vagas Ocupadas"],
-                        vagas_disponiveis=class_info["Qtde Vagas Disponíveis"],
-                        local=class_info["Local"]
-                    )
-                    session.add(new_class)
-
-            session.commit()
+            return self.upsert_classes(data)
         except Exception as e:
-            session.rollback()
             print(f"Error updating classes: {e}")
+            return []
+
+    def upsert_classes(self, data: list[dict]) -> list[dict]:
+        """
+        Insert or update a whole snapshot of classes in a single transaction.
+
+        Subjects are inserted if missing and class rows are upserted on the '_info_uc'
+        constraint, updating the vacancies and location of existing rows.
+        Each call bumps the snapshot version (see snapshot_version).
+        On PostgreSQL the class rows are streamed with COPY into a staging table first.
+
+        :param data: List of dictionaries as returned by SIGAA_Scraper.update_classes_info.
+        :return: Change events: the classes whose available spots went up (new classes
+            with spots included), with the get_df columns plus 'previous_spots'.
+        """
+        if not data:
+            return []
+
+        subject_names = {c["Código"]: c["Matéria"] for c in data}
+        subjects = [{"codigo": code, "subject": name} for code, name in subject_names.items()]
+        rows = self._class_rows(data)
+        insert = self._insert_construct()
+
+        with self._class_engine.begin() as conn:
+            periods = {row["ano_periodo"] for row in rows}
+            previous = {
+                tuple(record[:-1]): record[-1]
+                for record in conn.execute(
+                    select(*(getattr(Class_info, key) for key in self.CLASS_KEY), Class_info.vagas_disponiveis)
+                    .where(Class_info.ano_periodo.in_(periods))
+                )
+            }
+            changes = []
+            for row in rows:
+                before = previous.get(tuple(row[key] for key in self.CLASS_KEY), 0)
+                if row["vagas_disponiveis"] > before:
+                    changes.append({
+                        "subject": subject_names[row["codigo"]],
+                        "code": row["codigo"],
+                        "num": row["N_o"],
+                        "period": row["ano_periodo"],
+                        "professor": row["docente"],
+                        "schedule": row["horario"],
+                        "available_spots": row["vagas_disponiveis"],
+                        "previous_spots": before,
+                        "local": row["local"],
+                    })
+
+            conn.execute(insert(Subject).on_conflict_do_nothing(index_elements=["codigo"]), subjects)
+            conn.execute(self._bump_version("snapshot_version", self._class_engine))
+
+            if self._class_engine.dialect.driver == "psycopg2":
+                self._copy_upsert(conn, rows)
+            else:
+                stmt = insert(Class_info)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=list(self.CLASS_KEY),
+                    set_={
+                        "vagas_ofertadas": stmt.excluded.vagas_ofertadas,
+                        "vagas_ocupadas": stmt.excluded.vagas_ocupadas,
+                        "vagas_disponiveis": stmt.excluded.vagas_disponiveis,
+                        "local": stmt.excluded.local,
+                    },
+                )
+                conn.execute(stmt, rows)
+
+        return changes
+
+    def _insert_construct(self, engine=None):
+        """
+        Dialect specific insert construct, which supports ON CONFLICT clauses.
+
+        :param engine: Engine the statement runs on. Defaults to the classes engine.
+        """
+        if backend_name(engine or self._class_engine) == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        return insert
+
+    def _bump_version(self, key: str, engine):
+        """
+        Statement increasing a version counter of the meta table, starting at 1.
+
+        :param key: Meta key of the counter (e.g. "snapshot_version").
+        :param engine: Engine of the database holding the counter.
+        """
+        insert = self._insert_construct(engine)
+        return insert(Meta).values(key=key, value="1").on_conflict_do_update(
+            index_elements=["key"], set_={"value": cast(cast(Meta.value, Integer) + 1, String)}
+        )
+
+    def _class_rows(self, data: list[dict]) -> list[dict]:
+        """
+        Convert scraped records into Class_info rows, deduplicated on the class key.
+
+        A batch upsert can't touch the same row twice, so the last occurrence wins.
+
+        :param data: List of dictionaries as returned by SIGAA_Scraper.update_classes_info.
+        :return: List of dictionaries keyed by Class_info column names.
+        """
+        rows = {}
+        for class_info in data:
+            row = {
+                "codigo": class_info["Código"],
+                "N_o": class_info["N_o"],
+                "ano_periodo": class_info["Ano-Período"],
+                "docente": class_info["Docente"],
+                "horario": class_info["Horário"],
+                "vagas_ofertadas": int(class_info["Qtde Vagas Ofertadas"]),
+                "vagas_ocupadas": int(class_info["Qtde Vagas Ocupadas"]),
+                "vagas_disponiveis": int(class_info["Qtde Vagas Disponíveis"]),
+                "local": class_info["Local"],
+            }
+            rows[tuple(row[key] for key in self.CLASS_KEY)] = row
+        return list(rows.values())
+
+    def _copy_upsert(self, conn, rows: list[dict]) -> None:
+        """
+        Bulk load class rows on PostgreSQL using COPY into a temporary staging table,
+        followed by a single INSERT ... ON CONFLICT from the staging table.
+
+        :param conn: Connection with an open transaction.
+        :param rows: Rows as returned by _class_rows.
+        """
+        columns = list(rows[0].keys())
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([row[column] for column in columns])
+        buffer.seek(0)
+
+        column_list = ", ".join(f'"{column}"' for column in columns)
+        key_list = ", ".join(f'"{column}"' for column in self.CLASS_KEY)
+        updates = ", ".join(f'"{column}" = EXCLUDED."{column}"'
+                            for column in ("vagas_ofertadas", "vagas_ocupadas", "vagas_disponiveis", "local"))
+
+        cursor = conn.connection.driver_connection.cursor()
+        try:
+            cursor.execute(
+                "CREATE TEMP TABLE class_info_stage "
+                "(LIKE class_info INCLUDING DEFAULTS) ON COMMIT DROP"
+            )
+            # In CSV, COPY reads an unquoted empty field as NULL by default. Class rows have
+            # no NULLs, and an empty professor or schedule must stay '' to match '_info_uc'
+            cursor.copy_expert(
+                f"COPY class_info_stage ({column_list}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer
+            )
+            cursor.execute(
+                f"INSERT INTO class_info ({column_list}) "
+                f"SELECT {column_list} FROM class_info_stage "
+                f"ON CONFLICT ({key_list}) DO UPDATE SET {updates}"
+            )
         finally:
-            session.close()
+            cursor.close()
 
     def get_watched_items(self) -> list[tuple[int, str]]:
         """
@@ -364,4 +589,95 @@ class Database:
             session.rollback()
             print(f"Error removing item: {e}")
         finally:
-            session.close()
\ No newline at end of file
+            session.close()
+
+    def add_rule(self, chat_id: int, code: str | None = None, professor: str | None = None,
+                 class_number: str | None = None, min_seats: int = 1, busy_schedule: str | None = None) -> int:
+        """
+        Add a watch rule linked to a specific chat in the user database.
+
+        Args:
+            chat_id (int): The ID of the chat.
+            code (str, optional): Code of the subject.
+            professor (str, optional): Word of the professor's name.
+            class_number (str, optional): Number of the class.
+            min_seats (int): Minimum number of available seats.
+            busy_schedule (str, optional): SIGAA schedule the class must not conflict with.
+
+        Returns:
+            int: The ID of the new rule.
+        """
+        session = self._userSession()
+        try:
+            rule = Rule(chat_id=chat_id, codigo=code, docente=professor, N_o=class_number,
+                        min_vagas=min_seats, horario_ocupado=busy_schedule)
+            session.add(rule)
+            session.flush()
+            session.execute(self._bump_version("rules_version", self._user_engine))
+            session.commit()
+            return rule.rule_id
+        finally:
+            session.close()
+
+    def get_rules(self, chat_id: int | None = None) -> list[Rule]:
+        """
+        Retrieve the watch rules of a chat, or of every chat.
+
+        Args:
+            chat_id (int, optional): The ID of the chat. Defaults to every chat.
+
+        Returns:
+            list[Rule]: The rules, ordered by ID.
+        """
+        session = self._userSession()
+        try:
+            query = session.query(Rule).order_by(Rule.rule_id)
+            if chat_id is not None:
+                query = query.filter(Rule.chat_id == chat_id)
+            return query.all()
+        except Exception as e:
+            print(f"Error retrieving rules: {e}")
+            return []
+        finally:
+            session.close()
+
+    def remove_rule(self, chat_id: int, rule_id: int) -> bool:
+        """
+        Remove a watch rule of a chat.
+
+        Args:
+            chat_id (int): The ID of the chat owning the rule.
+            rule_id (int): The ID of the rule.
+
+        Returns:
+            bool: True if the rule was removed.
+        """
+        session = self._userSession()
+        try:
+            removed = session.query(Rule).filter(Rule.chat_id == chat_id, Rule.rule_id == rule_id).delete()
+            if removed:
+                session.execute(self._bump_version("rules_version", self._user_engine))
+            session.commit()
+            return removed > 0
+        except Exception as e:
+            session.rollback()
+            print(f"Error removing rule: {e}")
+            return False
+        finally:
+            session.close()
+
+    def rules_version(self) -> int:
+        """
+        Version of the watch rules, increased by every add_rule and remove_rule
+        (rule IDs can be reused, so the table's content can't tell). Used to know
+        when to rebuild rule indexes.
+
+        Returns:
+            int: The current version, 0 if no rule was ever added.
+        """
+        session = self._userSession()
+        try:
+            meta = session.get(Meta, "rules_version")
+            return int(meta.value) if meta else 0
+        finally:
+            session.close()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, UniqueConstraint
+from sqlalchemy import BigInteger, Column, Integer, String, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
@@ -13,10 +13,13 @@ class Chat(Base):
         items (list[Item]): A list of items associated with the chat, 
             ordered by the `item_id` of each item. This establishes a 
             one-to-many relationship with the `Item` model.
+        rules (list[Rule]): A list of watch rules of the chat, ordered by `rule_id`.
     """
     __tablename__ = 'chats'
-    chat_id = Column(Integer, primary_key=True)
+    # Telegram chat IDs don't fit in 32 bits (PostgreSQL's INTEGER)
+    chat_id = Column(BigInteger, primary_key=True)
     items = relationship("Item", order_by='Item.item_id', back_populates="chat")
+    rules = relationship("Rule", order_by='Rule.rule_id', back_populates="chat")
 
 class Item(Base):
     """
@@ -31,10 +34,35 @@ class Item(Base):
     """
     __tablename__ = 'items'
     item_id = Column(Integer, primary_key=True, autoincrement=True)
-    chat_id = Column(Integer, ForeignKey('chats.chat_id'), nullable=False)
+    chat_id = Column(BigInteger, ForeignKey('chats.chat_id'), nullable=False)
     item_data = Column(String, nullable=False, unique=True)
     chat = relationship("Chat", back_populates="items")
 
+class Rule(Base):
+    """
+    Represents a watch rule: the chat is notified when a class matching all
+    the rule's predicates gets new available seats.
+
+    Attributes:
+        rule_id (int): The primary key of the rule, auto-incremented.
+        chat_id (int): The foreign key referencing the 'chats' table.
+        codigo (str): Code of the subject, or None for any subject.
+        docente (str): Word of the professor's name, or None for any professor.
+        N_o (str): Number of the class, or None for any class.
+        min_vagas (int): Minimum number of available seats.
+        horario_ocupado (str): SIGAA schedule the class must not conflict with (e.g. "24M12 35T23"), or None.
+        chat (Chat): A relationship to the Chat model.
+    """
+    __tablename__ = 'rules'
+    rule_id = Column(Integer, primary_key=True, autoincrement=True)
+    chat_id = Column(BigInteger, ForeignKey('chats.chat_id'), nullable=False, index=True)
+    codigo = Column(String)
+    docente = Column(String)
+    N_o = Column(String)
+    min_vagas = Column(Integer, nullable=False, default=1)
+    horario_ocupado = Column(String)
+    chat = relationship("Chat", back_populates="rules")
+
 class Subject(Base):
     """
     Represents a subject in the database.
@@ -82,5 +110,22 @@ class Class_info(Base):
     vagas_ocupadas = Column(Integer)
     vagas_disponiveis = Column(Integer)
     local = Column(String)
-    __table_args__ = (UniqueConstraint('N_o', 'codigo', 'docente', 'ano_periodo', 'horario', name='_info_uc'),)
-    subject = relationship("Subject", back_populates="classes")
\ No newline at end of file
+    __table_args__ = (
+        UniqueConstraint('N_o', 'codigo', 'docente', 'ano_periodo', 'horario', name='_info_uc'),
+        # Queries are scoped to the active period, so index by period first
+        Index('ix_class_info_period_code', 'ano_periodo', 'codigo'),
+    )
+    subject = relationship("Subject", back_populates="classes")
+
+class Meta(Base):
+    """
+    Key/value metadata about the data stored in a database
+    (e.g. "snapshot_version" in the classes database, "rules_version" in the user database).
+
+    Attributes:
+        key (str): The primary key, name of the metadata entry.
+        value (str): The value of the entry.
+    """
+    __tablename__ = "meta"
+    key = Column(String, primary_key=True)
+    value = Column(String)
\ No newline at end of file
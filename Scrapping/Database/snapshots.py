@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+from datetime import date, datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Final
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+
+class SnapshotArchiver:
+    """
+    Archives each scraping cycle as compressed Parquet files.
+
+    Snapshots are partitioned by period and date:
+
+        <root>/period=2025.1/date=2025-03-27/snapshot-211800123456.parquet
+
+    A cycle that scraped a single source (a worker's department) is suffixed with it:
+
+        <root>/period=2025.1/date=2025-03-27/snapshot-211800123456-673.parquet
+
+    The snapshots of past days are compacted into one file per period and day
+    (`compacted.parquet`), keeping only the last cycle of each source as is.
+
+    Files are written to a temporary name and atomically renamed, so readers never see
+    a partial file. Reads are memory-mapped, which keeps warm starts cheap.
+    """
+
+    DEFAULT_DIR: Final = Path(__file__).resolve().parent.parent.parent / "snapshots"
+
+    # Scraper record keys and the archived column names, in the same order
+    FIELDS: Final = {
+        "Matéria": "subject",
+        "Código": "code",
+        "N_o": "num",
+        "Ano-Período": "period",
+        "Docente": "professor",
+        "Horário": "schedule",
+        "Qtde Vagas Ofertadas": "offered_spots",
+        "Qtde Vagas Ocupadas": "occupied_spots",
+        "Qtde Vagas Disponíveis": "available_spots",
+        "Local": "local",
+    }
+    # Columns identifying a class, matching Database.CLASS_KEY
+    KEY: Final = ("code", "num", "period", "professor", "schedule")
+
+    def __init__(self, root: str | Path | None = None, compression: str = "zstd"):
+        """
+        :param root: Directory of the archive. Defaults to `snapshots/` at the project root.
+        :param compression: Parquet compression codec.
+        """
+        self.root = Path(root) if root else self.DEFAULT_DIR
+        self.compression = compression
+        self._last_digest: dict[str | None, str] = {}
+        self._compacted: date | None = None
+
+    @staticmethod
+    def schema() -> pa.Schema:
+        """Typed schema of the archived snapshots."""
+        import pyarrow as pa
+
+        text = pa.dictionary(pa.int32(), pa.string())
+        return pa.schema([
+            ("subject", text),
+            ("code", text),
+            ("num", pa.string()),
+            ("period", text),
+            ("professor", text),
+            ("schedule", pa.string()),
+            ("offered_spots", pa.int16()),
+            ("occupied_spots", pa.int16()),
+            ("available_spots", pa.int16()),
+            ("local", text),
+            ("scraped_at", pa.timestamp("s")),
+        ])
+
+    def write(self, data: list[dict], when: datetime | None = None, source: str | None = None) -> list[Path]:
+        """
+        Archive one scraping cycle, one file per period found in the data.
+        A cycle identical to the previously written one of the same source is skipped.
+
+        :param data: List of dictionaries as returned by SIGAA_Scraper.update_classes_info.
+        :param when: Time of the cycle. Defaults to now.
+        :param source: What the cycle scraped (e.g. a department), or None for a full cycle.
+        :return: The written files.
+        """
+        digest = hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+        if not data or digest == self._last_digest.get(source):
+            return []
+
+        when = when or datetime.now()
+        by_period: dict[str, list[dict]] = {}
+        for record in data:
+            by_period.setdefault(record["Ano-Período"], []).append(record)
+
+        suffix = "" if source is None else "-" + re.sub(r"\W+", "_", source)
+        written = []
+        for period, records in by_period.items():
+            path = self.root / f"period={period}" / f"date={when:%Y-%m-%d}" / f"snapshot-{when:%H%M%S%f}{suffix}.parquet"
+            self._write_table(self._table(records, when), path)
+            written.append(path)
+
+        self._last_digest[source] = digest
+        if self._compacted != when.date():
+            self.compact(when.date())
+            self._compacted = when.date()
+        return written
+
+    def compact(self, before: date) -> list[Path]:
+        """
+        Merge the snapshots of the days before a date into one file per period and day,
+        so the archive doesn't grow by a file every cycle. The last cycle of each source
+        in a day is kept as is, for latest() to find it.
+
+        :param before: Days before this date are compacted.
+        :return: The compacted files that were written.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        written = []
+        for partition in self.root.glob("period=*/date=*"):
+            if partition.name >= f"date={before:%Y-%m-%d}":
+                continue
+            # Keep the newest file of each source: names sort by time within a day
+            files = sorted(partition.glob("snapshot-*.parquet"))
+            last = {path.stem.removeprefix("snapshot-").partition("-")[2]: path for path in files}
+            merged = [path for path in files if path not in last.values()]
+            if not merged:
+                continue
+
+            path = partition / "compacted.parquet"
+            tables = [pq.read_table(file, memory_map=True) for file in merged]
+            if path.exists():
+                tables.insert(0, pq.read_table(path, memory_map=True))
+            # Rows merged before an interrupted compaction may still be in their files
+            self._write_table(self._unique(pa.concat_tables(tables)), path)
+            for file in merged:
+                file.unlink()
+            written.append(path)
+        return written
+
+    def _unique(self, table: pa.Table) -> pa.Table:
+        """The table without repeated rows of a class scraped at the same time."""
+        keys = zip(*(table.column(column).to_pylist() for column in (*self.KEY, "scraped_at")))
+        first: dict[tuple, int] = {}
+        for index, key in enumerate(keys):
+            first.setdefault(key, index)
+        return table.take(sorted(first.values()))
+
+    def archive_period(self, period: str, records: list[dict]) -> Path:
+        """
+        Write the classes of a past period to cold storage, merging them with the
+        classes of that period archived before. A class archived again (e.g. its period
+        came back into the database) replaces its older copy.
+
+            <root>/cold/period=2024.2/classes.parquet
+
+        :param period: The archived period.
+        :param records: The classes, in the SIGAA_Scraper.update_classes_info format.
+        :return: The cold storage file.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        path = self.root / "cold" / f"period={period}" / "classes.parquet"
+        table = self._table(records, datetime.now())
+        if path.exists():
+            table = pa.concat_tables([pq.read_table(path, memory_map=True).cast(table.schema), table])
+            table = self._newest(table)
+        self._write_table(table, path)
+        return path
+
+    def _newest(self, table: pa.Table) -> pa.Table:
+        """The newest row of each class (by scraped_at, the last one on ties), in table order."""
+        keys = zip(*(table.column(column).to_pylist() for column in self.KEY))
+        times = table.column("scraped_at").to_pylist()
+        newest: dict[tuple, int] = {}
+        for index, key in enumerate(keys):
+            if key not in newest or times[index] >= times[newest[key]]:
+                newest[key] = index
+        return table.take(sorted(newest.values()))
+
+    def _table(self, records: list[dict], when: datetime) -> pa.Table:
+        """Arrow table of scraper records, with the archive schema."""
+        import pyarrow as pa
+
+        columns = {column: [record[key] for record in records] for key, column in self.FIELDS.items()}
+        for column in ("offered_spots", "occupied_spots", "available_spots"):
+            columns[column] = [int(value) for value in columns[column]]
+        columns["scraped_at"] = [when.replace(microsecond=0)] * len(records)
+        return pa.Table.from_pydict(columns, schema=self.schema())
+
+    def _write_table(self, table: pa.Table, path: Path) -> None:
+        """Write a table to a temporary file and atomically rename it to its final path."""
+        import pyarrow.parquet as pq
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        pq.write_table(table, tmp_path, compression=self.compression)
+        os.replace(tmp_path, path)
+
+    def latest(self) -> list[Path]:
+        """
+        Files of the most recent archived cycle of each source (one per period). Sources
+        scraped before the most recent full cycle are covered by it and left out.
+
+        :return: The files, or an empty list if nothing was archived yet.
+        """
+        # (date, time, source) -> files of the cycle, one per period
+        cycles: dict[tuple[str, str, str], list[Path]] = {}
+        for path in self.root.glob("period=*/date=*/snapshot-*.parquet"):
+            time, _, source = path.stem.removeprefix("snapshot-").partition("-")
+            cycles.setdefault((path.parent.name, time, source), []).append(path)
+
+        newest: dict[str, tuple[str, str, str]] = {}
+        for cycle in cycles:
+            if cycle > newest.get(cycle[2], ("",)):
+                newest[cycle[2]] = cycle
+        full = newest.pop("", None)
+        chosen = [cycle for cycle in newest.values() if full is None or cycle[:2] > full[:2]]
+        if full is not None:
+            chosen.append(full)
+        return sorted(path for cycle in chosen for path in cycles[cycle])
+
+    def read(self, paths: list[Path] | None = None) -> pa.Table:
+        """
+        Memory-map archived files into a single Arrow table.
+
+        :param paths: Files to read. Defaults to the latest cycle.
+        :return: The snapshot table (empty if there is nothing to read).
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        paths = self.latest() if paths is None else paths
+        if not paths:
+            return self.schema().empty_table()
+        return pa.concat_tables(pq.read_table(path, memory_map=True) for path in paths)
+
+    def load_latest(self) -> list[dict]:
+        """
+        Latest archived cycle in the scraper record format, to warm start the app
+        before the first scrape.
+
+        :return: List of dictionaries as returned by SIGAA_Scraper.update_classes_info.
+        """
+        table = self.read()
+        columns = {column: table.column(column).to_pylist() for column in self.FIELDS.values()}
+        return [
+            {key: columns[column][index] for key, column in self.FIELDS.items()}
+            for index in range(table.num_rows)
+        ]
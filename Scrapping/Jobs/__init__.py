@@ -0,0 +1 @@
+from .job_queue import JobQueue, Job, Event
\ No newline at end of file
@@ -0,0 +1,233 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Final, NamedTuple
+
+
+class Job(NamedTuple):
+    """
+    A leased job.
+
+    Attributes:
+        id (int): The primary key of the job.
+        kind (str): The kind of job (e.g. 'scrape').
+        payload (dict): The job arguments.
+        attempts (int): How many times the job has been leased, including this one.
+    """
+    id: int
+    kind: str
+    payload: dict
+    attempts: int
+
+
+class Event(NamedTuple):
+    """
+    A change event published by a worker.
+
+    Attributes:
+        id (int): Monotonic id of the event, used as a consumer cursor.
+        topic (str): The topic of the event (e.g. 'classes_updated').
+        payload (dict): The event data.
+    """
+    id: int
+    topic: str
+    payload: dict
+
+
+class JobQueue:
+    """
+    Local job queue and event log backed by a SQLite file.
+
+    Jobs are leased with a visibility timeout: a leased job is invisible to other workers
+    until the lease expires, so when a worker crashes its job is picked up again by
+    another worker once the timeout elapses. Jobs keyed with the same `key` are not
+    duplicated while one of them is still pending.
+    """
+
+    DEFAULT_PATH: Final = "jobs.db"
+
+    _SCHEMA: Final = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            key TEXT,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            available_at REAL NOT NULL,
+            lease_until REAL,
+            worker TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT,
+            finished_at REAL
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS ix_jobs_pending_key ON jobs(key) WHERE status = 'pending';
+        CREATE INDEX IF NOT EXISTS ix_jobs_available ON jobs(status, available_at);
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            topic TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            created_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS ix_events_topic ON events(topic, id);
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, visibility_timeout: float = 10 * 60, retention: float = 24 * 60 * 60):
+        """
+        Open (and create if needed) the queue database.
+
+        :param path: Path of the SQLite file shared by workers and bots.
+        :param visibility_timeout: Seconds a leased job stays hidden from other workers.
+        :param retention: Seconds finished jobs and events are kept before being pruned.
+        """
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.retention = retention
+        self._local = threading.local()
+        self._conn.executescript(self._SCHEMA)
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread, in autocommit mode so transactions are explicit."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, kind: str, payload: dict, key: str | None = None, delay: float = 0) -> bool:
+        """
+        Add a job to the queue.
+
+        :param kind: The kind of job.
+        :param payload: JSON serializable job arguments.
+        :param key: Deduplication key. The job is skipped if a pending job has the same key.
+        :param delay: Seconds before the job becomes available.
+        :return: True if the job was added.
+        """
+        cursor = self._conn.execute(
+            "INSERT OR IGNORE INTO jobs (kind, key, payload, available_at) VALUES (?, ?, ?, ?)",
+            (kind, key, json.dumps(payload), time.time() + delay),
+        )
+        return cursor.rowcount == 1
+
+    def lease(self, worker: str, kind: str | None = None) -> Job | None:
+        """
+        Lease the next available job, hiding it from other workers for the visibility timeout.
+
+        :param worker: Identifier of the worker taking the job.
+        :param kind: Only lease jobs of this kind.
+        :return: The leased job or None if no job is available.
+        """
+        now = time.time()
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id, kind, payload, attempts FROM jobs "
+                "WHERE status = 'pending' AND available_at <= ? "
+                "AND (lease_until IS NULL OR lease_until <= ?) "
+                "AND (? IS NULL OR kind = ?) "
+                "ORDER BY available_at LIMIT 1",
+                (now, now, kind, kind),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            job_id, job_kind, payload, attempts = row
+            conn.execute(
+                "UPDATE jobs SET lease_until = ?, worker = ?, attempts = attempts + 1 WHERE id = ?",
+                (now + self.visibility_timeout, worker, job_id),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        return Job(job_id, job_kind, json.loads(payload), attempts + 1)
+
+    def complete(self, job: Job, worker: str, repeat_after: float | None = None) -> None:
+        """
+        Mark a leased job as done.
+
+        :param job: The leased job.
+        :param worker: Identifier of the worker holding the lease.
+        :param repeat_after: If given, enqueue the same job again after this many seconds.
+        """
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            key = conn.execute("SELECT key FROM jobs WHERE id = ?", (job.id,)).fetchone()
+            done = conn.execute(
+                "UPDATE jobs SET status = 'done', finished_at = ? WHERE id = ? AND worker = ?",
+                (time.time(), job.id, worker),
+            ).rowcount == 1
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        # A worker whose lease was taken over leaves the repetition to the new holder
+        if done and repeat_after is not None:
+            self.enqueue(job.kind, job.payload, key[0] if key else None, delay=repeat_after)
+        self._prune()
+
+    def fail(self, job: Job, worker: str, error: str, retry_after: float = 60) -> None:
+        """
+        Release a leased job after an error, so it is retried after a delay.
+
+        :param job: The leased job.
+        :param worker: Identifier of the worker holding the lease.
+        :param error: Description of the error.
+        :param retry_after: Seconds before the job becomes available again.
+        """
+        self._conn.execute(
+            "UPDATE jobs SET lease_until = NULL, worker = NULL, available_at = ?, last_error = ? "
+            "WHERE id = ? AND worker = ?",
+            (time.time() + retry_after, error, job.id, worker),
+        )
+
+    def publish(self, topic: str, payload: dict) -> None:
+        """
+        Append an event to the event log.
+
+        :param topic: The topic of the event.
+        :param payload: JSON serializable event data.
+        """
+        self._conn.execute(
+            "INSERT INTO events (topic, payload, created_at) VALUES (?, ?, ?)",
+            (topic, json.dumps(payload), time.time()),
+        )
+
+    def consume(self, topic: str, after: int) -> list[Event]:
+        """
+        Read the events of a topic published after a cursor.
+
+        :param topic: The topic to read.
+        :param after: Id of the last event already handled by the consumer.
+        :return: The new events, oldest first.
+        """
+        rows = self._conn.execute(
+            "SELECT id, topic, payload FROM events WHERE topic = ? AND id > ? ORDER BY id",
+            (topic, after),
+        ).fetchall()
+        return [Event(event_id, event_topic, json.loads(payload)) for event_id, event_topic, payload in rows]
+
+    def last_event_id(self) -> int:
+        """Id of the most recent event, used to start consuming from 'now'."""
+        return self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+
+    def _prune(self) -> None:
+        """Delete finished jobs and events older than the retention period."""
+        limit = time.time() - self.retention
+        self._conn.execute("DELETE FROM jobs WHERE status = 'done' AND finished_at < ?", (limit,))
+        self._conn.execute("DELETE FROM events WHERE created_at < ?", (limit,))
+
+    def close(self) -> None:
+        """Close the connection of the calling thread."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,103 @@
+import os
+import signal
+from pathlib import Path
+
+
+def rss_mb(pid: int) -> float:
+    """
+    Resident memory of a process in MB, 0 if it is gone (or /proc is unavailable).
+
+    :param pid: The process ID.
+    """
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def _stat(pid: int | str) -> list[str] | None:
+    """
+    Fields of /proc/<pid>/stat following the process name (state, ppid, ...),
+    None if the process is gone.
+    """
+    try:
+        # The process name is between parentheses and may contain spaces
+        return Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()
+    except (OSError, IndexError):
+        return None
+
+
+def start_time(pid: int) -> int | None:
+    """
+    Start time of a process (in clock ticks since boot), None if it is gone.
+    A PID reused by another process has a different start time.
+
+    :param pid: The process ID.
+    """
+    fields = _stat(pid)
+    return int(fields[19]) if fields else None
+
+
+def descendants(pid: int) -> list[int]:
+    """
+    IDs of all the processes started by a process, recursively
+    (e.g. the Firefox processes started by geckodriver).
+
+    :param pid: The process ID.
+    """
+    children: dict[int, list[int]] = {}
+    for path in Path("/proc").glob("[0-9]*"):
+        fields = _stat(path.name)
+        if fields is not None:
+            children.setdefault(int(fields[1]), []).append(int(path.name))
+
+    found, pending = [], [pid]
+    while pending:
+        for child in children.get(pending.pop(), []):
+            found.append(child)
+            pending.append(child)
+    return found
+
+
+def tree_rss_mb(pid: int) -> float:
+    """
+    Resident memory of a process and all its descendants, in MB.
+
+    :param pid: The process ID.
+    """
+    return rss_mb(pid) + sum(rss_mb(child) for child in descendants(pid))
+
+
+def identify(pids: list[int]) -> dict[int, int]:
+    """
+    Record the start time of processes, to kill them later without hitting
+    another process that reused one of their PIDs.
+
+    :param pids: The process IDs.
+    :return: The start time of each process still alive.
+    """
+    started = {pid: start_time(pid) for pid in pids}
+    return {pid: time for pid, time in started.items() if time is not None}
+
+
+def kill(processes: dict[int, int]) -> int:
+    """
+    Kill the processes still alive among the given ones. A PID whose start time
+    changed belongs to a new process and is left alone.
+
+    :param processes: Start time of each process, as returned by identify.
+    :return: The number of processes that had to be killed.
+    """
+    killed = 0
+    for pid, started in processes.items():
+        if start_time(pid) != started:
+            continue
+        try:
+            os.kill(pid, signal.SIGKILL)
+            killed += 1
+        except (ProcessLookupError, PermissionError):
+            pass
+    return killed
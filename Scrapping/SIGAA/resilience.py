@@ -0,0 +1,145 @@
+import os
+import random
+import threading
+import time
+from typing import Callable, NamedTuple, TypeVar
+
+T = TypeVar("T")
+
+
+class ScraperError(Exception):
+    """Raised when a scraping step fails (SIGAA down, slow or changed)."""
+
+
+class StepTimeouts(NamedTuple):
+    """
+    Seconds each scraping step may wait for SIGAA.
+
+    Attributes:
+        portal (float): Loading the classes search page.
+        department (float): Selecting the department and submitting the search.
+        table (float): Waiting for the classes table.
+    """
+    portal: float = 15
+    department: float = 10
+    table: float = 20
+
+    MIN = 2
+    MAX = 120
+
+    @classmethod
+    def from_env(cls) -> "StepTimeouts":
+        """
+        Timeouts from the SIGAA_TIMEOUT_PORTAL, SIGAA_TIMEOUT_DEPARTMENT and SIGAA_TIMEOUT_TABLE
+        environment variables, falling back to the defaults and bounded to [MIN, MAX].
+        """
+        values = []
+        for field in cls._fields:
+            value = float(os.getenv(f"SIGAA_TIMEOUT_{field.upper()}", cls._field_defaults[field]))
+            values.append(min(max(value, cls.MIN), cls.MAX))
+        return cls(*values)
+
+
+class RetryPolicy:
+    """Retries a call with exponential backoff and jitter."""
+
+    def __init__(self, attempts: int = 3, base_delay: float = 5, max_delay: float = 60, factor: float = 2):
+        """
+        :param attempts: Total number of attempts, including the first one.
+        :param base_delay: Seconds to wait after the first failure.
+        :param max_delay: Upper bound of the wait between attempts.
+        :param factor: Growth of the wait after each failure.
+        """
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.factor = factor
+
+    def delay(self, failures: int) -> float:
+        """
+        Seconds to wait after a number of consecutive failures, with "full jitter".
+
+        :param failures: Number of consecutive failures, starting at 1.
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * self.factor ** (failures - 1)))
+
+    def call(self, func: Callable[[], T], stop_event: threading.Event | None = None,
+             on_failure: Callable[[Exception], None] | None = None) -> T:
+        """
+        Call a function until it succeeds or the attempts are exhausted.
+
+        :param func: The function to call.
+        :param stop_event: If set while waiting, stop retrying and raise the last error.
+        :param on_failure: Called with the error after each failed attempt (e.g. to reset the browser).
+        :return: The result of the function.
+        :raises Exception: The error of the last attempt.
+        """
+        for attempt in range(1, self.attempts + 1):
+            try:
+                return func()
+            except Exception as e:
+                if on_failure is not None:
+                    on_failure(e)
+                if attempt == self.attempts:
+                    raise
+                delay = self.delay(attempt)
+                print(f"Attempt {attempt} failed ({e}), retrying in {delay:.0f}s")
+                if stop_event is not None:
+                    if stop_event.wait(delay):
+                        raise
+                else:
+                    time.sleep(delay)
+
+
+class CircuitBreaker:
+    """
+    Stops calling SIGAA while it is down.
+
+    After `failure_threshold` consecutive failures the breaker opens and `allow` returns
+    False for `reset_timeout` seconds. Then a single trial call is allowed (half-open):
+    a success closes the breaker, a failure opens it again for twice as long, up to
+    `max_reset_timeout`.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 5 * 60, max_reset_timeout: float = 60 * 60):
+        self.failure_threshold = failure_threshold
+        self.base_reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """'closed', 'open' or 'half-open'."""
+        if self.opened_at is None:
+            return "closed"
+        return "open" if self.remaining() > 0 else "half-open"
+
+    def remaining(self) -> float:
+        """Seconds until the next trial call is allowed, 0 if calls are allowed."""
+        if self.opened_at is None:
+            return 0
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        """Whether SIGAA may be called now."""
+        return self.remaining() == 0
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.reset_timeout = self.base_reset_timeout
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.opened_at is not None:
+                # The half-open trial failed: back off further
+                self.reset_timeout = min(self.reset_timeout * 2, self.max_reset_timeout)
+                self.opened_at = time.monotonic()
+            elif self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                print(f"SIGAA looks down, pausing scraping for {self.reset_timeout:.0f}s")
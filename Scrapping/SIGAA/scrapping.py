@@ -4,34 +4,82 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support.select import Select
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.firefox.options import Options
-from selenium.common.exceptions import NoSuchElementException, TimeoutException
-import pandas as pd
+from selenium.common.exceptions import (InvalidSessionIdException, NoSuchElementException, NoSuchWindowException,
+                                        TimeoutException, WebDriverException)
+from urllib3.exceptions import HTTPError
+
+from .resilience import ScraperError, StepTimeouts
+from .processes import descendants, identify, kill
 
 import time
 
-from typing import Final, NoReturn
+from typing import Final
+
+def is_browser_failure(error: Exception) -> bool:
+    """
+    Whether a scraping error comes from the browser itself (crashed Firefox, lost
+    session, geckodriver gone), so that restarting it can help. SIGAA being down,
+    slow or changed (ScraperError, missing or stale elements, ...) is not.
+
+    :param error: The error raised while scraping.
+    """
+    if isinstance(error, (InvalidSessionIdException, NoSuchWindowException)):
+        return True
+    if isinstance(error, (ConnectionError, HTTPError)):
+        # The connection to geckodriver was refused or dropped
+        return True
+    # The subclasses of WebDriverException are about the page, the base class about the driver
+    return type(error) is WebDriverException
+
 
 class SIGAA_Scraper:
-    def __init__(self):
+    def __init__(self, timeouts: StepTimeouts | None = None):
+        """
+        Starts a headless Firefox.
+
+        :param timeouts: Seconds each step may wait for SIGAA. Defaults to StepTimeouts.from_env().
+        """
+        self.timeouts = timeouts or StepTimeouts.from_env()
         options = Options()
         options.add_argument("--headless")
         self.driver: Final = webdriver.Firefox(options=options)
+        self.driver.set_page_load_timeout(self.timeouts.portal)
         
     def access_portal(self):
-        wait = WebDriverWait(self.driver, 15)
         try:
             self.driver.get("https://sigaa.unb.br/sigaa/public/turmas/listar.jsf")
             
-        except Exception as e:
-            print(e)
-            self.quit()
-            self._terminate()
+        except TimeoutException as e:
+            raise ScraperError(f"SIGAA portal did not load in {self.timeouts.portal}s") from e
+        except WebDriverException as e:
+            # Firefox shows its network error page when SIGAA is unreachable (DNS, refused, reset...)
+            if "about:neterror" in (e.msg or "") or "Reached error page" in (e.msg or ""):
+                raise ScraperError(f"SIGAA is unreachable: {e.msg}") from e
+            raise
+        
+    def list_departments(self) -> list[str]:
+        """
+        Lists the values of the departments available in the search dropdown.
+        Must be called after access_portal.
+        """
+        wait = WebDriverWait(self.driver, self.timeouts.department)
+        dropdown = wait.until(
+            EC.presence_of_element_located((By.XPATH, '//*[@id="formTurma:inputDepto"]'))
+        )
+        values = [option.get_attribute("value") for option in Select(dropdown).options]
+        # The first option is the "select a department" placeholder
+        return [value for value in values if value and value not in ("0", "-1")]
         
-    def access_classes(self):
+    def access_classes(self, department: str | None = None):
+        """
+        Searches the classes of a department.
+
+        :param department: Value of the department in the dropdown. Defaults to the FCTE (third item).
+        """
         print("Searching on SIGAA...")
-        wait = WebDriverWait(self.driver, 10)
+        wait = WebDriverWait(self.driver, self.timeouts.department)
         try:
-            # Handle the dropdown (wait max 10 seconds)
+            # Handle the dropdown
             dropdown = wait.until(
                 EC.presence_of_element_located((By.XPATH, '//*[@id="formTurma:inputDepto"]'))
             )
@@ -39,7 +87,10 @@ class SIGAA_Scraper:
             # Check if it's a standard select element
             if dropdown.tag_name.lower() == 'select':
                 select = Select(dropdown)
-                select.select_by_index(2)  # Second item (index starts at 0)
+                if department is not None:
+                    select.select_by_value(department)
+                else:
+                    select.select_by_index(2)  # Second item (index starts at 0)
             else:
                 # For custom dropdowns (div/ul/li structure)
                 dropdown.click()
@@ -55,11 +106,10 @@ class SIGAA_Scraper:
             submit_button.click()
             
         except (NoSuchElementException, TimeoutException) as e:
-            print(f"Element not found: {str(e)}")
-            self._terminate()
+            raise ScraperError(f"Element not found: {str(e)}") from e
     
-    def update_classes_info(self, save_in_file=False) -> list[dict]:
-        wait = WebDriverWait(self.driver, 20)
+    def update_classes_info(self) -> list[dict]:
+        wait = WebDriverWait(self.driver, self.timeouts.table)
         
         try:
             # Find all rows in the table body
@@ -67,8 +117,7 @@ class SIGAA_Scraper:
                 EC.presence_of_all_elements_located((By.XPATH, "//table/tbody/tr"))
             )
         except (NoSuchElementException, TimeoutException) as e:
-            print(e)
-            self._terminate()
+            raise ScraperError(f"Classes table not found: {str(e)}") from e
 
         data = []
         subject_code = subject_name = None
@@ -116,13 +165,6 @@ class SIGAA_Scraper:
                 })
                 
         print('Done!')
-        
-        if save_in_file:     
-            # Create the DataFrame
-            df = pd.DataFrame(data)
-            file_name = 'classes_info.csv'
-            df.to_csv(file_name, index=False)
-            print(f"Saved data in {file_name}")
             
         return data
     
@@ -130,10 +172,30 @@ class SIGAA_Scraper:
     def wait(secs) -> None:
         time.sleep(secs)
         
+    @property
+    def pid(self) -> int | None:
+        """PID of the geckodriver process, the parent of the Firefox processes."""
+        process = getattr(self.driver.service, "process", None)
+        return process.pid if process else None
+        
     def quit(self):
-        self.driver.quit()
-    
-    def _terminate(self):
-        import sys
-        sys.exit(1)
-        
\ No newline at end of file
+        """
+        Quits the browser and makes sure geckodriver and every Firefox process are gone,
+        even when the driver doesn't answer anymore.
+        """
+        pid = self.pid
+        children = identify(descendants(pid)) if pid else {}
+        try:
+            self.driver.quit()
+        except Exception as e:
+            print(f"Browser did not quit cleanly: {e}")
+        finally:
+            process = getattr(self.driver.service, "process", None)
+            killed = kill(children)
+            if process is not None and process.poll() is None:
+                process.kill()
+                killed += 1
+            if process is not None:
+                process.wait(timeout=5)  # Reap geckodriver, avoiding a zombie
+            if killed:
+                print(f"Killed {killed} leftover browser processes")
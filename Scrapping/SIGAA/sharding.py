@@ -0,0 +1,289 @@
+import os
+import queue
+import threading
+import time
+from typing import Callable, NamedTuple
+
+from .resilience import ScraperError
+
+
+class HostResources(NamedTuple):
+    """
+    Snapshot of the host resources.
+
+    Attributes:
+        mem_available_mb (float): Memory available without swapping, in MB.
+        mem_total_mb (float): Total memory, in MB.
+        cpus (int): Number of CPUs.
+        load (float): 1 minute load average.
+    """
+    mem_available_mb: float
+    mem_total_mb: float
+    cpus: int
+    load: float
+
+    @property
+    def idle_cpus(self) -> int:
+        """CPUs not used by the current load, at least 1."""
+        return max(1, round(self.cpus - self.load))
+
+
+def measure_resources() -> HostResources:
+    """
+    Measure the free memory and CPU of the host, from /proc/meminfo on Linux
+    (Raspberry Pi included) or psutil when it is installed elsewhere.
+    """
+    cpus = os.cpu_count() or 1
+    try:
+        load = os.getloadavg()[0]
+    except (AttributeError, OSError):
+        load = 0.0
+
+    try:
+        with open("/proc/meminfo") as meminfo:
+            values = {line.split(":")[0]: float(line.split()[1]) / 1024 for line in meminfo}
+        return HostResources(values["MemAvailable"], values["MemTotal"], cpus, load)
+    except (OSError, KeyError):
+        pass
+
+    try:
+        import psutil
+        memory = psutil.virtual_memory()
+        return HostResources(memory.available / 2**20, memory.total / 2**20, cpus, load)
+    except ImportError:
+        # Unknown host: behave as a small one, allowing a single browser
+        return HostResources(0, 0, cpus, load)
+
+
+def plan_shards(resources: HostResources, departments: int, browser_mb: float = 350, reserve_mb: float = 256) -> int:
+    """
+    Number of browser sessions the host can afford.
+
+    :param resources: Measured host resources.
+    :param departments: Number of departments to scrape, no point in more sessions than that.
+    :param browser_mb: Memory used by one Firefox session (Firefox + geckodriver).
+    :param reserve_mb: Memory kept free for the system, the bot and the database.
+    :return: The number of sessions, at least 1.
+    """
+    by_memory = int((resources.mem_available_mb - reserve_mb) // browser_mb)
+    return max(1, min(departments, resources.idle_cpus, by_memory))
+
+
+class ShardReport(NamedTuple):
+    """
+    Outcome of one browser session.
+
+    Attributes:
+        shard (int): Index of the session.
+        departments (list[str]): Departments scraped by the session.
+        failed (list[str]): Departments that failed in the session.
+        rows (int): Number of classes scraped.
+        seconds (float): Time the session was alive.
+        shed (bool): Whether the session stopped early because of memory pressure.
+    """
+    shard: int
+    departments: list[str]
+    failed: list[str]
+    rows: int
+    seconds: float
+    shed: bool
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+class ShardedScraper:
+    """
+    Scrapes several departments with concurrent browser sessions.
+
+    The number of sessions is sized from the free memory and idle CPUs of the host.
+    Departments are taken from a shared queue, one at a time per session, so each
+    department is scraped by a single session. Before each department a session checks
+    the memory again and, under pressure, hands the department back and closes its
+    browser. The first session never sheds, and departments handed back after it
+    finished are scraped by a last session, so the scrape always completes. Departments
+    that failed are retried by another session, and those still failing are returned.
+
+    Sessions outlive a run: launching Firefox costs seconds and a burst of memory every
+    cycle, so healthy sessions are kept idle for the next run and reused. Sessions are
+    only quit when their browser failed, when they are shed under memory pressure, when
+    the host can afford fewer sessions at the start of a run, or by close().
+    """
+
+    def __init__(self, departments: list[str], shards: int | None = None, browser_mb: float = 350,
+                 reserve_mb: float = 256, scraper_factory: Callable | None = None, retries: int = 1):
+        """
+        :param departments: Values of the departments to scrape.
+        :param shards: Number of sessions. Defaults to what the host can afford at each run (see plan_shards).
+        :param browser_mb: Memory used by one browser session.
+        :param reserve_mb: Memory kept free, sessions are shed below it.
+        :param scraper_factory: Builds a scraper session. Defaults to SIGAA_Scraper.
+        :param retries: Number of times the failed departments are retried.
+        """
+        self.departments = departments
+        self.retries = retries
+        self.browser_mb = browser_mb
+        self.reserve_mb = reserve_mb
+        self.shards = shards
+        if scraper_factory is None:
+            from .scrapping import SIGAA_Scraper
+            scraper_factory = SIGAA_Scraper
+        self.scraper_factory = scraper_factory
+        self._idle: list = []  # Sessions kept alive between runs
+        self._idle_lock = threading.Lock()
+
+    def plan(self) -> int:
+        """
+        Number of sessions for the next run. The idle sessions' memory counts as available,
+        since they would be reused.
+        """
+        if self.shards:
+            return self.shards
+        resources = measure_resources()
+        with self._idle_lock:
+            idle_mb = len(self._idle) * self.browser_mb
+        resources = resources._replace(mem_available_mb=resources.mem_available_mb + idle_mb)
+        return plan_shards(resources, len(self.departments), self.browser_mb, self.reserve_mb)
+
+    def _acquire(self):
+        """An idle session, or a new one."""
+        with self._idle_lock:
+            if self._idle:
+                return self._idle.pop()
+        return self.scraper_factory()
+
+    def _release(self, scraper) -> None:
+        """Keep a healthy session for the next department or run."""
+        with self._idle_lock:
+            self._idle.append(scraper)
+
+    def _shed(self, keep: int) -> None:
+        """Quit the idle sessions beyond `keep`."""
+        with self._idle_lock:
+            extra, self._idle = self._idle[keep:], self._idle[:keep]
+        for scraper in extra:
+            scraper.quit()
+
+    def close(self) -> None:
+        """Quit the idle sessions. The next run launches new ones."""
+        self._shed(0)
+
+    def run(self) -> tuple[list[dict], list[ShardReport], list[str]]:
+        """
+        Scrape all departments.
+
+        :return: The scraped classes, the report of each session and the departments
+            that failed every attempt (their classes are missing from the data).
+        :raises ScraperError: If every department failed.
+        """
+        shards = self.plan()
+        self._shed(shards)
+        pending: queue.Queue[str] = queue.Queue()
+        for department in self.departments:
+            pending.put(department)
+
+        data: list[dict] = []
+        reports: list[ShardReport] = []
+        lock = threading.Lock()
+
+        def shard(index: int, can_shed: bool) -> None:
+            started = time.perf_counter()
+            done, failed, rows, shed = [], [], [], False
+            scraper = None
+            try:
+                while True:
+                    try:
+                        department = pending.get_nowait()
+                    except queue.Empty:
+                        break
+                    if can_shed and measure_resources().mem_available_mb < self.reserve_mb:
+                        pending.put(department)
+                        shed = True
+                        break
+                    try:
+                        if scraper is None:
+                            scraper = self._acquire()
+                        scraper.access_portal()
+                        scraper.access_classes(department)
+                        rows.extend(scraper.update_classes_info())
+                        done.append(department)
+                    except Exception as e:
+                        print(f"Shard {index} failed on department {department}: {e}")
+                        failed.append(department)
+                        if not isinstance(e, ScraperError) and scraper is not None:
+                            # The browser itself failed, start a new one for the next department
+                            scraper.quit()
+                            scraper = None
+            finally:
+                if scraper is not None:
+                    if shed:
+                        scraper.quit()
+                    else:
+                        self._release(scraper)
+                with lock:
+                    data.extend(rows)
+                    reports.append(ShardReport(index, done, failed, len(rows), time.perf_counter() - started, shed))
+
+        threads = [threading.Thread(target=shard, args=(index, index > 0), name=f"shard-{index}")
+                   for index in range(shards)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if not pending.empty():
+            # Departments handed back after the first session finished
+            shard(len(threads), False)
+
+        failed = failed_departments(reports)
+        for _ in range(self.retries):
+            if not failed:
+                break
+            for department in failed:
+                pending.put(department)
+            shard(len(reports), False)
+            failed = failed_departments(reports)
+
+        if measure_resources().mem_available_mb < self.reserve_mb:
+            # Don't hold idle browsers until the next run while the host is short of memory
+            self._shed(1)
+        reports.sort(key=lambda report: report.shard)
+        if self.departments and len(failed) == len(self.departments):
+            raise ScraperError(f"All {len(self.departments)} departments failed")
+        return data, reports, failed
+
+
+def failed_departments(reports: list[ShardReport]) -> list[str]:
+    """
+    Departments that failed and were not scraped by any other attempt.
+
+    :param reports: The reports of the sessions.
+    """
+    done = {department for report in reports for department in report.departments}
+    failed = [department for report in reports for department in report.failed if department not in done]
+    return list(dict.fromkeys(failed))
+
+
+def format_report(reports: list[ShardReport]) -> str:
+    """
+    Human readable throughput report of a sharded scrape.
+
+    :param reports: The reports returned by ShardedScraper.run.
+    """
+    lines = []
+    for report in reports:
+        line = (f"shard {report.shard}: {len(report.departments)} departments, {report.rows} rows "
+                f"in {report.seconds:.1f}s ({report.rows_per_sec:.1f} rows/s)")
+        if report.failed:
+            line += f", failed: {', '.join(report.failed)}"
+        if report.shed:
+            line += ", shed under memory pressure"
+        lines.append(line)
+    total_rows = sum(report.rows for report in reports)
+    wall = max((report.seconds for report in reports), default=0)
+    line = f"total: {total_rows} rows in {wall:.1f}s ({total_rows / wall if wall else 0:.1f} rows/s)"
+    failed = failed_departments(reports)
+    if failed:
+        line += f", missing departments: {', '.join(failed)}"
+    lines.append(line)
+    return "\n".join(lines)
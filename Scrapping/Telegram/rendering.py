@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from string import Formatter
+from typing import TYPE_CHECKING, Final
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class ClassRenderer:
+    """
+    Renders class rows into Telegram messages.
+
+    The message template is compiled once into literal and field parts, and whole
+    DataFrames are formatted with vectorized string concatenation. Rendered rows are
+    cached per (class, snapshot version) and paginated results per (query, snapshot version),
+    so the "next page" buttons are served from the cache.
+
+    The caches are shared by the bot's loop and the scraper thread's notifications,
+    so they are only touched under a lock.
+    """
+
+    MESSAGE_LIMIT: Final = 4096  # Telegram's limit for a message text
+    TEMPLATE: Final = (
+        "{available_spots} vagas encontradas para {subject} turma {num} "
+        "com {professor} no horário {schedule} "
+        "{local} para o semestre {period}.\n\n"
+    )
+    # Columns identifying a class in the DataFrames returned by Database.get_df
+    KEY: Final = ("code", "num", "period", "professor", "schedule")
+
+    def __init__(self, limit: int = MESSAGE_LIMIT, max_queries: int = 256):
+        """
+        :param limit: Maximum length of a page.
+        :param max_queries: Number of paginated results kept in the cache.
+        """
+        self.limit = limit
+        self.max_queries = max_queries
+        self._parts = [(literal, field) for literal, field, _, _ in Formatter().parse(self.TEMPLATE)]
+        self._rows: dict[tuple, str] = {}
+        self._pages: OrderedDict[tuple[str, int], list[str]] = OrderedDict()
+        self._version: int | None = None
+        self._lock = threading.RLock()
+
+    def _set_version(self, version: int) -> None:
+        """Drops the cached rows of older snapshot versions."""
+        if version != self._version:
+            self._rows.clear()
+            self._version = version
+
+    def render_rows(self, df: pd.DataFrame, version: int) -> list[str]:
+        """
+        Render each class row of a DataFrame, reusing the rows already rendered
+        for this snapshot version.
+
+        :param df: Classes, as returned by Database.filter.
+        :param version: Snapshot version the rows come from.
+        :return: The rendered text of each row, in the DataFrame order.
+        """
+        keys = list(zip(*(df[column] for column in self.KEY), [version] * len(df)))
+        with self._lock:
+            self._set_version(version)
+            missing = [index for index, key in enumerate(keys) if key not in self._rows]
+
+            if missing:
+                rows = df.iloc[missing]
+                text = ""
+                for literal, field in self._parts:
+                    text = text + literal
+                    if field is not None:
+                        text = text + rows[field].astype(str)
+                for index, rendered in zip(missing, text):
+                    self._rows[keys[index]] = rendered
+
+            return [self._rows[key] for key in keys]
+
+    def render_event(self, event: dict) -> str:
+        """
+        Render a single change event (see Database.upsert_classes) with the same template.
+
+        :param event: The change event.
+        :return: The rendered text.
+        """
+        return self.TEMPLATE.format_map(event)
+
+    def paginate(self, blocks: list[str]) -> list[str]:
+        """
+        Pack rendered blocks into pages no longer than the limit.
+        A block longer than the limit is split over several pages.
+
+        :param blocks: Rendered rows.
+        :return: The pages.
+        """
+        pages = []
+        page = ""
+        for block in blocks:
+            if len(page) + len(block) > self.limit and page:
+                pages.append(page)
+                page = ""
+            while len(block) > self.limit:
+                pages.append(block[:self.limit])
+                block = block[self.limit:]
+            page += block
+        if page:
+            pages.append(page)
+        return pages
+
+    def pages(self, query: str, df: pd.DataFrame, version: int) -> list[str]:
+        """
+        Paginated rendering of the result of a query, cached per snapshot version.
+
+        :param query: Identifies the result (e.g. the searched subject code).
+        :param df: Classes matching the query, as returned by Database.filter.
+        :param version: Snapshot version the rows come from.
+        :return: The pages.
+        """
+        key = (query, version)
+        with self._lock:
+            if key in self._pages:
+                self._pages.move_to_end(key)
+                return self._pages[key]
+
+            pages = self.paginate(self.render_rows(df, version))
+            self._pages[key] = pages
+            if len(self._pages) > self.max_queries:
+                self._pages.popitem(last=False)
+            return pages
+
+    def page(self, query: str, version: int, number: int) -> tuple[str, int] | None:
+        """
+        A page of a cached result.
+
+        :param query: Identifies the result.
+        :param version: Snapshot version of the result.
+        :param number: Index of the page, starting at 0.
+        :return: The page text and the number of pages, or None if the result is no longer cached.
+        """
+        with self._lock:
+            pages = self._pages.get((query, version))
+        if pages is None or not 0 <= number < len(pages):
+            return None
+        return pages[number], len(pages)
@@ -0,0 +1,177 @@
+import re
+import unicodedata
+from typing import Final, NamedTuple
+
+CODE_PATTERN: Final = re.compile(r'^[A-Za-z]{3,4}\d{4}$')
+# SIGAA schedules: days (2 = monday ... 7 = saturday), shift (Morning, afTernoon, Night) and slots
+SCHEDULE_PATTERN: Final = re.compile(r'([2-7]+)([MTN])([1-7]+)')
+
+
+def normalize(text: str) -> str:
+    """Uppercase without accents, so 'José' matches 'JOSE'."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).upper()
+
+
+def name_tokens(name: str) -> set[str]:
+    """Words of a (normalized) professor name, ignoring workloads like '(60h)'."""
+    return {token for token in re.split(r'[^A-Z]+', normalize(name)) if len(token) > 1}
+
+
+def schedule_slots(schedule: str) -> frozenset[tuple[str, str, str]]:
+    """
+    Expand a SIGAA schedule into (day, shift, slot) tuples.
+
+    >>> sorted(schedule_slots("35T45"))
+    [('3', 'T', '4'), ('3', 'T', '5'), ('5', 'T', '4'), ('5', 'T', '5')]
+    """
+    return frozenset(
+        (day, shift, slot)
+        for days, shift, slots in SCHEDULE_PATTERN.findall(schedule or "")
+        for day in days
+        for slot in slots
+    )
+
+
+class WatchRule(NamedTuple):
+    """
+    A compiled watch rule.
+
+    Attributes:
+        rule_id (int): The ID of the rule.
+        chat_id (int): The chat to notify.
+        code (str | None): Code of the subject.
+        professor (str | None): Normalized word of the professor's name.
+        num (str | None): Number of the class, without leading zeros.
+        min_seats (int): Minimum number of available seats.
+        busy (frozenset): Slots the class must not use (see schedule_slots).
+    """
+    rule_id: int
+    chat_id: int
+    code: str | None
+    professor: str | None
+    num: str | None
+    min_seats: int
+    busy: frozenset
+
+    @classmethod
+    def from_model(cls, rule) -> "WatchRule":
+        """Compile a Database.models.Rule."""
+        return cls(
+            rule.rule_id,
+            rule.chat_id,
+            rule.codigo.upper() if rule.codigo else None,
+            normalize(rule.docente) if rule.docente else None,
+            rule.N_o.lstrip("0") if rule.N_o else None,
+            rule.min_vagas or 1,
+            schedule_slots(rule.horario_ocupado),
+        )
+
+    def matches(self, event: dict, professor_tokens: set[str], slots: frozenset) -> bool:
+        """
+        Check the rule's predicates against a change event.
+
+        :param event: Change event, see Database.upsert_classes.
+        :param professor_tokens: name_tokens of the event's professor.
+        :param slots: schedule_slots of the event's schedule.
+        """
+        return (
+            (self.code is None or self.code == event["code"])
+            and (self.professor is None or self.professor in professor_tokens)
+            and (self.num is None or self.num == str(event["num"]).lstrip("0"))
+            and event["available_spots"] >= self.min_seats
+            and not (self.busy & slots)
+        )
+
+
+class RuleIndex:
+    """
+    Watch rules indexed for matching change events.
+
+    Every rule has a subject code or a professor (the /watch command enforces it), so
+    each rule is stored under its code or, without one, under its professor word.
+    An event only checks the rules stored under its code and under the words of its
+    professor's name, so matching costs time proportional to the events and their
+    candidate rules, not to all rules times all classes.
+    """
+
+    def __init__(self, rules: list[WatchRule]):
+        self.by_code: dict[str, list[WatchRule]] = {}
+        self.by_professor: dict[str, list[WatchRule]] = {}
+        self.size = 0
+        for rule in rules:
+            self.add(rule)
+
+    def add(self, rule: WatchRule) -> None:
+        if rule.code is not None:
+            self.by_code.setdefault(rule.code, []).append(rule)
+        elif rule.professor is not None:
+            self.by_professor.setdefault(rule.professor, []).append(rule)
+        else:
+            raise ValueError("A watch rule needs a subject code or a professor")
+        self.size += 1
+
+    def match(self, events: list[dict]) -> dict[int, list[dict]]:
+        """
+        Match change events against the rules.
+
+        :param events: Change events, see Database.upsert_classes.
+        :return: The matched events of each chat, each event at most once per chat.
+        """
+        matches: dict[int, list[dict]] = {}
+        for event in events:
+            professor_tokens = name_tokens(event["professor"] or "")
+            slots = schedule_slots(event["schedule"])
+            candidates = list(self.by_code.get(event["code"], ()))
+            for token in professor_tokens:
+                candidates.extend(self.by_professor.get(token, ()))
+
+            notified = set()
+            for rule in candidates:
+                if rule.chat_id not in notified and rule.matches(event, professor_tokens, slots):
+                    notified.add(rule.chat_id)
+                    matches.setdefault(rule.chat_id, []).append(event)
+        return matches
+
+
+def parse_watch(args: list[str]) -> dict:
+    """
+    Parse the arguments of the /watch command into Database.add_rule arguments.
+
+        /watch FGA0001 prof=SILVA turma=01 vagas=2 evitar=24M12,35T23
+
+    :param args: The command arguments.
+    :return: The add_rule keyword arguments.
+    :raises ValueError: With a message for the user when the arguments are invalid.
+    """
+    rule = {}
+    for arg in args:
+        key, _, value = arg.partition("=")
+        key = key.lower()
+        if not value:
+            if not CODE_PATTERN.match(arg):
+                raise ValueError(f"'{arg}' não é um código de matéria válido (ex.: FGA0001).")
+            rule["code"] = arg.upper()
+        elif key == "prof":
+            # Stored as matched: one word of name_tokens, e.g. "D'Avila" is "AVILA"
+            tokens = name_tokens(value)
+            if len(tokens) != 1:
+                raise ValueError(f"'prof' deve ser uma única palavra do nome do professor (ex.: prof=SILVA), não '{value}'.")
+            rule["professor"] = tokens.pop()
+        elif key == "turma":
+            rule["class_number"] = value
+        elif key == "vagas":
+            if not value.isdigit() or int(value) < 1:
+                raise ValueError("'vagas' deve ser um número maior que zero.")
+            rule["min_seats"] = int(value)
+        elif key == "evitar":
+            busy = value.replace(",", " ").upper()
+            if not schedule_slots(busy):
+                raise ValueError(f"'{value}' não é um horário do SIGAA válido (ex.: 24M12).")
+            rule["busy_schedule"] = busy
+        else:
+            raise ValueError(f"Filtro '{key}' desconhecido. Use prof, turma, vagas ou evitar.")
+
+    if "code" not in rule and "professor" not in rule:
+        raise ValueError("Informe ao menos o código da matéria ou prof=<nome do professor>.")
+    return rule
@@ -1,25 +1,42 @@
 # Creating Bot class
 import asyncio
 from typing import Self
-from telegram import Update
-from telegram.ext import Application, ApplicationBuilder, CommandHandler, MessageHandler, ContextTypes, filters
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram.ext import (Application, ApplicationBuilder, BaseHandler, CallbackQueryHandler, CommandHandler,
+                          MessageHandler, ContextTypes, filters)
 from Database import Database
+from Jobs import JobQueue
+from Telegram.rendering import ClassRenderer
+from Telegram.rules import RuleIndex, WatchRule, parse_watch
 from asyncio import sleep  # Import sleep for periodic checks
 
 class SIGAAMOS_bot:
     """Telegram bot for managing SIGAA notifications."""
 
-    def __init__(self, TOKEN: str, db_handler: Database):
+    STALE_AFTER = 30 * 60  # Seconds after which the data is reported as outdated
+
+    def __init__(self, TOKEN: str, db_handler: Database, base_url: str | None = None, concurrent_updates: int = 1):
         """
         Initialize the bot with the given token and database handler.
         
         :param TOKEN: Telegram bot token.
         :param db_handler: Instance of the Database class.
+        :param base_url: Bot API base URL, to use a local Bot API server. Defaults to Telegram's.
+        :param concurrent_updates: Number of updates handled at the same time. Defaults to 1,
+            one after the other.
         """
-        self.bot = ApplicationBuilder().token(TOKEN).build()
+        builder = ApplicationBuilder().token(TOKEN)
+        if base_url:
+            builder = builder.base_url(base_url)
+        if concurrent_updates > 1:
+            builder = builder.concurrent_updates(concurrent_updates)
+        self.bot = builder.build()
         self.db = db_handler
+        self.renderer = ClassRenderer()
+        self._rule_index: RuleIndex | None = None
+        self._rules_version: int | None = None
         
-        self.__handlers: list[CommandHandler] = []
+        self.__handlers: list[BaseHandler] = []
         
     def register_handlers(self) -> None:
         """Register all command handlers with the bot."""
@@ -31,10 +48,13 @@ class SIGAAMOS_bot:
         self.__handlers.append(CommandHandler("start", self._start_handler))
         self.__handlers.append(CommandHandler("search", self._search_handler))
         self.__handlers.append(CommandHandler("warn", self._warn_handler))
+        self.__handlers.append(CommandHandler("status", self._status_handler))
+        self.__handlers.append(CommandHandler("watch", self._watch_handler))
+        self.__handlers.append(CallbackQueryHandler(self._page_handler, pattern=r"^page:"))
         
         return self
         
-    def add_handler(self, handler: CommandHandler) -> None:
+    def add_handler(self, handler: BaseHandler) -> None:
         """
         Add a custom command handler to the bot.
         
@@ -78,19 +98,104 @@ class SIGAAMOS_bot:
         filtered_result = result[result['code'] == query]
 
         if filtered_result.empty:
-            response = f"Nenhuma sala de {query} encontrada com vagas disponíveis."
+            await update.message.reply_text(f"Nenhuma sala de {query} encontrada com vagas disponíveis.")
+            return
+
+        version = self.db.snapshot_version()
+        pages = self.renderer.pages(query, filtered_result, version)
+        await update.message.reply_text(pages[0], reply_markup=self._page_buttons(query, version, 0, len(pages)))
+
+        warning = self._stale_warning()
+        if warning:
+            await update.message.reply_text(warning)
             
-        else:
-            response = ""
-            for _, row in filtered_result.iterrows():
-                response += (
-                    f"{row['available_spots']} vagas encontradas para {row['subject']} turma {row['num']} "
-                    f"com {row['professor']} no horário {row['schedule']} "
-                    f"{row['local']} para o semestre {row['period']}.\n\n"
-                )
+    def _stale_warning(self) -> str | None:
+        """
+        Warning about outdated data, when the last complete scrape is older than STALE_AFTER.
+        """
+        from datetime import datetime
+
+        meta = self.db.get_meta()
+        last_success = meta.get("last_success_at")
+        if last_success is None:
+            return None
+        age = (datetime.now() - datetime.fromisoformat(last_success)).total_seconds()
+        if age < self.STALE_AFTER:
+            return None
+        since = f"{datetime.fromisoformat(last_success):%d/%m %H:%M}"
+        if meta.get("failed_departments") and meta.get("last_partial_at", "") > last_success:
+            return (f"⚠️ Não consigo ler alguns departamentos do SIGAA ({meta['failed_departments']}) desde {since}, "
+                    "os dados deles podem estar desatualizados.")
+        return f"⚠️ Não consigo acessar o SIGAA desde {since}, os dados podem estar desatualizados."
 
+    async def _status_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """
+        Handle the /status command, reporting when the data was last updated.
+        
+        :param update: Update instance.
+        :param context: Context instance.
+        """
+        from datetime import datetime
+
+        meta = self.db.get_meta()
+        if "last_success_at" not in meta and "last_partial_at" not in meta:
+            await update.message.reply_text("Ainda não consegui ler os dados do SIGAA.")
+            return
+
+        last_success = meta.get("last_success_at", "")
+        if last_success:
+            response = (f"Última atualização: {datetime.fromisoformat(last_success):%d/%m %H:%M} "
+                        f"({meta.get('last_success_rows', '?')} turmas).")
+        else:
+            response = "Ainda não consegui ler todos os departamentos do SIGAA."
+        if meta.get("failed_departments") and meta.get("last_partial_at", "") > last_success:
+            response += (f"\nÚltima atualização parcial: {datetime.fromisoformat(meta['last_partial_at']):%d/%m %H:%M} "
+                         f"({meta.get('last_partial_rows', '?')} turmas), sem os departamentos "
+                         f"{meta['failed_departments']}.")
+        elif meta.get("last_error_at", "") > last_success:
+            response += f"\nÚltima falha: {datetime.fromisoformat(meta['last_error_at']):%d/%m %H:%M}."
+        warning = self._stale_warning()
+        if warning:
+            response += f"\n\n{warning}"
         await update.message.reply_text(response)
         
+    @staticmethod
+    def _page_buttons(query: str, version: int, number: int, total: int) -> InlineKeyboardMarkup | None:
+        """
+        Inline buttons to move between the pages of a /search result.
+
+        :param query: The searched subject code.
+        :param version: Snapshot version of the result.
+        :param number: Index of the page being shown.
+        :param total: Number of pages.
+        """
+        buttons = []
+        if number > 0:
+            buttons.append(InlineKeyboardButton("◀ Página anterior", callback_data=f"page:{query}:{version}:{number - 1}"))
+        if number < total - 1:
+            buttons.append(InlineKeyboardButton("Próxima página ▶", callback_data=f"page:{query}:{version}:{number + 1}"))
+        return InlineKeyboardMarkup([buttons]) if buttons else None
+        
+    async def _page_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """
+        Handle the page buttons of a /search result, serving the page from the render cache.
+        
+        :param update: Update instance.
+        :param context: Context instance.
+        """
+        callback = update.callback_query
+        _, query, version, number = callback.data.split(":")
+        page = self.renderer.page(query, int(version), int(number))
+        await callback.answer()
+
+        if page is None:
+            await callback.edit_message_reply_markup(reply_markup=None)
+            await callback.message.reply_text(f"Esse resultado expirou. Use /search {query} novamente.")
+            return
+
+        text, total = page
+        await callback.edit_message_text(text, reply_markup=self._page_buttons(query, int(version), int(number), total))
+        
     def _save_warning(self, chat_id: int, subject_code: str):
         """
         Save a warning to the database.
@@ -152,24 +257,99 @@ class SIGAAMOS_bot:
         self._save_warning(chat_id, query)  # Save the warning to the database
         await update.message.reply_text(f"Vou te avisar quando {query} estiver livre")
         
-    async def _notify_users(self):
+    async def _watch_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """
+        Handle the /watch command, managing watch rules:
+
+            /watch                      lists the chat's rules
+            /watch FGA0001 prof=SILVA turma=01 vagas=2 evitar=24M12
+            /watch stop <id>            removes a rule
+
+        :param update: Update instance.
+        :param context: Context instance.
+        """
+        chat_id = update.effective_chat.id
+        args = context.args or []
+
+        if not args:
+            rules = self.db.get_rules(chat_id)
+            if not rules:
+                await update.message.reply_text(
+                    "Você não tem regras. Exemplo: /watch FGA0001 prof=SILVA turma=01 vagas=2 evitar=24M12"
+                )
+                return
+            lines = [f"{rule.rule_id}: " + " ".join(
+                part for part in (
+                    rule.codigo,
+                    rule.docente and f"prof={rule.docente}",
+                    rule.N_o and f"turma={rule.N_o}",
+                    rule.min_vagas > 1 and f"vagas={rule.min_vagas}",
+                    rule.horario_ocupado and f"evitar={rule.horario_ocupado.replace(' ', ',')}",
+                ) if part
+            ) for rule in rules]
+            await update.message.reply_text("Suas regras:\n" + "\n".join(lines))
+            return
+
+        if args[0].lower() == "stop":
+            if len(args) != 2 or not args[1].isdigit() or not self.db.remove_rule(chat_id, int(args[1])):
+                await update.message.reply_text("Use /watch stop <número da regra>, veja as regras com /watch.")
+                return
+            await update.message.reply_text(f"Regra {args[1]} removida.")
+            return
+
+        try:
+            rule = parse_watch(args)
+        except ValueError as e:
+            await update.message.reply_text(str(e))
+            return
+
+        self.db.add_chat(chat_id)
+        rule_id = self.db.add_rule(chat_id, **rule)
+        await update.message.reply_text(f"Regra {rule_id} criada. Vou te avisar quando abrir vaga numa turma que combine.")
+
+    def _rules(self) -> RuleIndex:
+        """
+        The index of all watch rules, rebuilt only when the rules table changed.
+        """
+        version = self.db.rules_version()
+        if self._rule_index is None or version != self._rules_version:
+            self._rule_index = RuleIndex([WatchRule.from_model(rule) for rule in self.db.get_rules()])
+            self._rules_version = version
+        return self._rule_index
+
+    async def _notify_rules(self, events: list[dict]):
+        """
+        Notify the chats whose watch rules match the change events of a scraping cycle.
+
+        :param events: Change events, see Database.upsert_classes.
+        """
+        if not events:
+            return
+        for chat_id, matched in self._rules().match(events).items():
+            blocks = [self.renderer.render_event(event) for event in matched]
+            for page in self.renderer.paginate(blocks):
+                await self.bot.bot.send_message(chat_id=chat_id, text=page)
+
+    async def _notify_users(self, codes: set[str] | None = None):
         """
         Check the database for updates and notify users if their watched subjects have available spots.
+
+        :param codes: Only notify about these subjects (e.g. those that changed). Defaults to every subject.
         """
         watched_items = self.db.get_watched_items()
+        if codes is not None:
+            watched_items = [(chat_id, code) for chat_id, code in watched_items if code in codes]
+        if not watched_items:
+            return
+        
+        result = self.db.filter(by='availability')
+        version = self.db.snapshot_version()
         for chat_id, subject_code in watched_items:
-            result = self.db.filter(by='availability')
             filtered_result = result[result['code'] == subject_code]
 
             if not filtered_result.empty:
-                response = ""
-                for _, row in filtered_result.iterrows():
-                    response += (
-                        f"{row['available_spots']} vagas encontradas para {row['subject']} turma {row['num']} "
-                        f"com {row['professor']} no horário {row['schedule']} "
-                        f"{row['local']} para o semestre {row['period']}.\n\n"
-                    )
-                await self.bot.bot.send_message(chat_id=chat_id, text=response)
+                for page in self.renderer.pages(subject_code, filtered_result, version):
+                    await self.bot.bot.send_message(chat_id=chat_id, text=page)
 
     async def _periodic_check(self):
         """
@@ -179,14 +359,42 @@ class SIGAAMOS_bot:
             await self._notify_users()
             await sleep(2*60)  # Wait for 10 minutes
 
-    def run(self):
-        """Start the bot and begin polling for updates."""
+    async def _consume_events(self, events: JobQueue, poll: float = 5):
+        """
+        Notify users whenever a scraper worker publishes a 'classes_updated' event.
+        Workers publish one event per department, so only the subjects whose available
+        spots went up in the consumed events are notified, once per poll.
+
+        :param events: Queue the workers publish their events to.
+        :param poll: Seconds between two reads of the event log.
+        """
+        cursor = events.last_event_id()
+        while True:
+            new_events = events.consume("classes_updated", cursor)
+            if new_events:
+                cursor = new_events[-1].id
+                changes = [change for event in new_events for change in event.payload.get("changes", [])]
+                if changes:
+                    await self._notify_users({change["code"] for change in changes})
+                    await self._notify_rules(changes)
+            await sleep(poll)
+
+    def run(self, events: JobQueue | None = None):
+        """
+        Start the bot and begin polling for updates.
+
+        :param events: If given, users are notified on the workers' change events
+            instead of on a fixed period.
+        """
         print("Bot is running...")
         loop = asyncio.get_event_loop()  # Get the current event loop
-        loop.create_task(self._periodic_check())  # Schedule periodic checks
+        if events is not None:
+            loop.create_task(self._consume_events(events))
+        else:
+            loop.create_task(self._periodic_check())  # Schedule periodic checks
         self.bot.run_polling(poll_interval=3)
         
     @property
-    def handlers(self) -> list[CommandHandler]:
+    def handlers(self) -> list[BaseHandler]:
         """Get the list of command handlers."""
         return self.__handlers
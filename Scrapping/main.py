@@ -18,8 +18,37 @@ print(TOKEN)
 from App import App
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="SIGAAMOS bot")
+    # all: scraper and bot in one process (default)
+    # worker: only scraping jobs pulled from the queue
+    # bot: only the Telegram bot, notified by the workers' events
+    parser.add_argument("mode", nargs="?", default=os.getenv("APP_MODE", "all"), choices=["all", "worker", "bot"])
+    # Answer from the last persisted snapshot and run the first scrape in background
+    parser.add_argument("--fast-start", action="store_true", default=os.getenv("FAST_START") == "1")
+    # Serve the catalog over a local HTTP/JSON API
+    parser.add_argument("--api-port", type=int, default=int(os.getenv("API_PORT", "0")) or None)
+    args = parser.parse_args()
+    mode = args.mode
+
     app = App()
-    app.setup(TOKEN)
-    app.run()
+    if args.api_port:
+        app.start_api(args.api_port, host=os.getenv("API_HOST", "127.0.0.1"))
+    if mode == "all":
+        app.setup(TOKEN, fast_start=args.fast_start)
+        app.run()
+    else:
+        from Jobs import JobQueue
+        queue = JobQueue(os.getenv("JOB_QUEUE_PATH", JobQueue.DEFAULT_PATH))
+        try:
+            if mode == "worker":
+                app.run_worker(queue, app.departments or [None])
+            elif mode == "bot":
+                app.run_frontend(TOKEN, queue)
+        except KeyboardInterrupt:
+            pass
     app.close()
+    # Non-zero when the app stopped itself to be restarted (e.g. App.EXIT_MEMORY)
+    raise SystemExit(app.exit_code)
     
@@ -0,0 +1,87 @@
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+from glob import glob
+from pathlib import Path
+
+import pytest
+
+SCRAPPING_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRAPPING_DIR))
+
+
+def _postgres_bin(name: str) -> str | None:
+    """Path of a PostgreSQL server binary, on PATH or in the Debian/Ubuntu layout."""
+    found = shutil.which(name)
+    if found:
+        return found
+    candidates = sorted(glob(f"/usr/lib/postgresql/*/bin/{name}"))
+    return candidates[-1] if candidates else None
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(scope="session")
+def postgres_url():
+    """
+    URL of a PostgreSQL database for the tests: TEST_POSTGRES_URL if set, otherwise a
+    throwaway server launched with the local initdb/pg_ctl. Skips when neither is
+    available or psycopg2 isn't installed.
+    """
+    pytest.importorskip("psycopg2")
+    if os.getenv("TEST_POSTGRES_URL"):
+        yield os.environ["TEST_POSTGRES_URL"]
+        return
+
+    initdb, pg_ctl = _postgres_bin("initdb"), _postgres_bin("pg_ctl")
+    if not initdb or not pg_ctl:
+        pytest.skip("no PostgreSQL server binaries (initdb, pg_ctl) and TEST_POSTGRES_URL is not set")
+
+    workdir = tempfile.mkdtemp(prefix="sigaamos-pg-")
+    data = os.path.join(workdir, "data")
+    port = _free_port()
+    try:
+        subprocess.run([initdb, "-D", data, "-U", "postgres", "-A", "trust"], check=True, capture_output=True)
+        subprocess.run(
+            [pg_ctl, "-D", data, "-l", os.path.join(workdir, "server.log"), "-w", "start",
+             "-o", f"-p {port} -k {workdir} -h 127.0.0.1"],
+            check=True, capture_output=True,
+        )
+    except (OSError, subprocess.CalledProcessError) as e:
+        shutil.rmtree(workdir, ignore_errors=True)
+        detail = (getattr(e, "stderr", None) or b"").decode(errors="replace").strip() or str(e)
+        pytest.skip(f"could not start a local PostgreSQL server: {detail}")
+
+    try:
+        yield f"postgresql+psycopg2://postgres@127.0.0.1:{port}/postgres"
+    finally:
+        subprocess.run([pg_ctl, "-D", data, "-m", "immediate", "stop"], capture_output=True)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def db(request, tmp_path):
+    """An empty Database, on SQLite files and on PostgreSQL."""
+    from Database.database import Database
+    from Database.models import Base
+
+    if request.param == "sqlite":
+        database = Database(f"sqlite:///{tmp_path}/chats.db", f"sqlite:///{tmp_path}/classes.db")
+        yield database
+        database.close()
+        return
+
+    url = request.getfixturevalue("postgres_url")
+    database = Database(url, url)
+    Base.metadata.drop_all(database._class_engine)
+    Base.metadata.create_all(database._class_engine)
+    yield database
+    Base.metadata.drop_all(database._class_engine)
+    database.close()
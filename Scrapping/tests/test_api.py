@@ -0,0 +1,83 @@
+import gzip
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from Api.server import CatalogServer
+from test_database import class_info
+
+
+@pytest.fixture
+def api():
+    server = CatalogServer(port=0).start()
+    yield server
+    server.stop()
+
+
+def get(api, path: str, **headers) -> tuple[int, dict, bytes]:
+    host, port = api.address
+    request = urllib.request.Request(f"http://{host}:{port}{path}", headers=headers)
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, dict(response.headers), response.read()
+    except urllib.error.HTTPError as error:
+        return error.code, dict(error.headers), error.read()
+
+
+def test_refresh_serves_every_period_in_the_database(api, db):
+    db.upsert_classes([
+        class_info("FGA0001", "01", available=5, period="2025.1"),
+        class_info("FGA0001", "01", available=0, period="2024.2"),
+        class_info("FGA0002", "01", available=3, period="2024.2"),
+    ])
+    assert api.refresh(db)
+    assert not api.refresh(db)
+
+    _, _, body = get(api, "/classes?code=fga0001")
+    assert [row["period"] for row in json.loads(body)] == ["2025.1"]
+    _, _, body = get(api, "/classes?code=FGA0001&period=2024.2")
+    assert [row["period"] for row in json.loads(body)] == ["2024.2"]
+    _, _, body = get(api, "/classes?period=all")
+    assert len(json.loads(body)) == 3
+    _, _, body = get(api, "/subjects")
+    assert [subject["code"] for subject in json.loads(body)] == ["FGA0001"]
+    _, _, body = get(api, "/status")
+    assert json.loads(body)["period"] == "2025.1"
+
+
+def test_etag_and_not_modified(api):
+    api.publish(7, [{"code": "FGA0001", "subject": "MATERIA", "period": "2025.1", "available_spots": 2}], "2025.1")
+
+    status, headers, body = get(api, "/availability?code=FGA0001")
+    assert (status, headers["ETag"]) == (200, '"7"')
+    assert json.loads(body)[0]["available_spots"] == 2
+
+    status, headers, body = get(api, "/availability?code=FGA0001", **{"If-None-Match": '"7"'})
+    assert (status, headers["ETag"], body) == (304, '"7"', b"")
+
+    api.publish(8, [], "2025.1")
+    status, headers, body = get(api, "/availability?code=FGA0001", **{"If-None-Match": '"7"'})
+    assert (status, headers["ETag"], json.loads(body)) == (200, '"8"', [])
+
+
+def test_gzip(api):
+    classes = [{"code": f"FGA{index:04}", "subject": "MATERIA", "period": "2025.1", "available_spots": 1}
+               for index in range(5000)]
+    api.publish(3, classes, "2025.1")
+
+    status, headers, body = get(api, "/classes", **{"Accept-Encoding": "gzip"})
+    assert (status, headers["Content-Encoding"], headers["ETag"]) == (200, "gzip", '"3-gz"')
+    assert json.loads(gzip.decompress(body)) == classes
+
+    # The compressed and plain representations don't share an ETag
+    status, _, _ = get(api, "/classes", **{"Accept-Encoding": "gzip", "If-None-Match": '"3"'})
+    assert status == 200
+    status, _, _ = get(api, "/classes", **{"Accept-Encoding": "gzip", "If-None-Match": '"3-gz"'})
+    assert status == 304
+
+
+def test_unknown_endpoint(api):
+    status, _, _ = get(api, "/teachers")
+    assert status == 404
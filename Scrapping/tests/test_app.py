@@ -0,0 +1,84 @@
+import pytest
+
+
+class StaticScraper:
+    """Stands in for SIGAA_Scraper, always returning the same classes."""
+
+    CLASSES = [
+        {
+            "Matéria": "MATERIA FGA0001", "Código": "FGA0001", "N_o": num, "Ano-Período": "2025.1",
+            "Docente": "FULANO DE TAL (60h)", "Horário": "35T23", "Qtde Vagas Ofertadas": "40",
+            "Qtde Vagas Ocupadas": "38", "Qtde Vagas Disponíveis": 2, "Local": "FGA - S1",
+        }
+        for num in ("01", "02")
+    ]
+    pid = None
+
+    def access_portal(self):
+        pass
+
+    def access_classes(self, department=None):
+        pass
+
+    def update_classes_info(self) -> list[dict]:
+        return [dict(class_info) for class_info in self.CLASSES]
+
+    def quit(self):
+        pass
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    monkeypatch.delenv("SIGAA_DEPARTMENTS", raising=False)
+    from App import App
+
+    app = App(scraper_factory=StaticScraper)
+    app.retry.attempts = 1
+    yield app
+    app.close()
+
+
+def test_cycle_records_a_success(app):
+    app.cycle()
+
+    meta = app._App__db.get_meta()
+    assert meta["last_success_rows"] == str(len(StaticScraper.CLASSES))
+    assert "last_error_at" not in meta
+    assert app.breaker.failures == 0
+
+
+def test_failed_database_write_is_not_a_success(app, monkeypatch):
+    def broken(data):
+        raise RuntimeError("disk I/O error")
+
+    monkeypatch.setattr(app._App__db, "upsert_classes", broken)
+    app.cycle()
+
+    meta = app._App__db.get_meta()
+    assert "last_success_at" not in meta
+    assert "disk I/O error" in meta["last_error"]
+    assert app.breaker.failures == 1
+
+
+def test_worker_archives_its_departments(app, tmp_path, monkeypatch):
+    from Jobs.job_queue import JobQueue
+
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    completed = []
+    complete = queue.complete
+
+    def complete_and_stop(job, worker, repeat_after=None):
+        complete(job, worker, repeat_after)
+        completed.append(job.payload["department"])
+        if len(completed) == 2:
+            app._stop_event.set()
+
+    monkeypatch.setattr(queue, "complete", complete_and_stop)
+    app.run_worker(queue, ["673", "674"], worker_id="w1")
+    queue.close()
+
+    assert sorted(completed) == ["673", "674"]
+    snapshots = sorted(path.name for path in (tmp_path / "snapshots").rglob("snapshot-*.parquet"))
+    assert [name.rsplit("-", 1)[1] for name in snapshots] == ["673.parquet", "674.parquet"]
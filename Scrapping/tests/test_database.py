@@ -0,0 +1,145 @@
+from Database.models import Class_info
+
+
+def class_info(code="FGA0001", num="01", available=5, offered=40, local="FGA - S1",
+               period="2025.1", professor="FULANO DE TAL (60h)", schedule="35T23") -> dict:
+    """A class as scraped by SIGAA_Scraper.update_classes_info."""
+    return {
+        "Matéria": f"MATERIA {code}",
+        "Código": code,
+        "N_o": num,
+        "Ano-Período": period,
+        "Docente": professor,
+        "Horário": schedule,
+        "Qtde Vagas Ofertadas": str(offered),
+        "Qtde Vagas Ocupadas": str(offered - available),
+        "Qtde Vagas Disponíveis": available,
+        "Local": local,
+    }
+
+
+def class_rows(db) -> dict[tuple[str, str], Class_info]:
+    session = db.sessions[1]()
+    try:
+        return {(row.codigo, row.N_o): row for row in session.query(Class_info)}
+    finally:
+        session.close()
+
+
+def test_upsert_inserts_subjects_and_classes(db):
+    changes = db.upsert_classes([
+        class_info("FGA0001", "01", available=5),
+        class_info("FGA0001", "02", available=0),
+        class_info("FGA0002", "01", available=3),
+    ])
+
+    rows = class_rows(db)
+    assert sorted(rows) == [("FGA0001", "01"), ("FGA0001", "02"), ("FGA0002", "01")]
+    assert rows[("FGA0001", "01")].vagas_ofertadas == 40
+    assert rows[("FGA0001", "01")].vagas_ocupadas == 35
+    assert set(db.get_df()["subject"]) == {"MATERIA FGA0001", "MATERIA FGA0002"}
+    # New classes with available spots are reported, as going up from 0
+    assert sorted((change["code"], change["num"], change["previous_spots"]) for change in changes) == [
+        ("FGA0001", "01", 0), ("FGA0002", "01", 0),
+    ]
+
+
+def test_upsert_updates_existing_classes(db):
+    db.upsert_classes([class_info("FGA0001", "01", available=5), class_info("FGA0001", "02", available=4)])
+    changes = db.upsert_classes([
+        class_info("FGA0001", "01", available=2, local="FGA - I1"),
+        class_info("FGA0001", "02", available=6),
+    ])
+
+    rows = class_rows(db)
+    assert len(rows) == 2
+    assert rows[("FGA0001", "01")].vagas_disponiveis == 2
+    assert rows[("FGA0001", "01")].vagas_ocupadas == 38
+    assert rows[("FGA0001", "01")].local == "FGA - I1"
+    assert rows[("FGA0001", "02")].vagas_disponiveis == 6
+    assert [(change["num"], change["previous_spots"], change["available_spots"]) for change in changes] == [
+        ("02", 4, 6),
+    ]
+
+
+def test_upsert_deduplicates_the_batch(db):
+    db.upsert_classes([
+        class_info("FGA0001", "01", available=5),
+        class_info("FGA0001", "01", available=7),
+    ])
+
+    rows = class_rows(db)
+    assert len(rows) == 1
+    assert rows[("FGA0001", "01")].vagas_disponiveis == 7
+
+
+def test_upsert_bumps_the_snapshot_version(db):
+    assert db.snapshot_version() == 0
+    db.upsert_classes([class_info()])
+    assert db.snapshot_version() == 1
+    db.upsert_classes([class_info(available=1)])
+    assert db.snapshot_version() == 2
+    assert db.upsert_classes([]) == []
+    assert db.snapshot_version() == 2
+
+
+def test_update_classes_reports_changes(db):
+    assert len(db.update_classes([class_info(available=1)])) == 1
+    assert db.update_classes([class_info(available=1)]) == []
+    assert db.snapshot_version() == 2
+
+
+def test_update_classes_keeps_the_data_on_error(db):
+    db.update_classes([class_info(available=5)])
+    broken = class_info(available=9)
+    del broken["Local"]
+
+    assert db.update_classes([class_info("FGA0002"), broken]) == []
+    assert list(class_rows(db)) == [("FGA0001", "01")]
+    assert class_rows(db)[("FGA0001", "01")].vagas_disponiveis == 5
+    assert db.snapshot_version() == 1
+
+
+def test_meta_entries_are_replaced(db):
+    db.set_meta({"last_success_at": "2025-03-01T10:00:00", "last_success_rows": 10})
+    db.set_meta({"last_success_rows": 12})
+
+    meta = db.get_meta()
+    assert meta["last_success_at"] == "2025-03-01T10:00:00"
+    assert meta["last_success_rows"] == "12"
+
+
+def test_chats_with_64_bit_ids(db):
+    chat_id = -1001234567890  # A Telegram supergroup, beyond 32 bits
+    db.add_chat(chat_id)
+    db.add_item(chat_id, "FGA0001")
+    rule_id = db.add_rule(chat_id, code="FGA0001")
+
+    assert db.get_watched_items() == [(chat_id, "FGA0001")]
+    assert [(rule.rule_id, rule.chat_id) for rule in db.get_rules(chat_id)] == [(rule_id, chat_id)]
+
+
+def test_upsert_keeps_empty_professor_and_schedule(db):
+    db.upsert_classes([class_info(professor="", schedule="", available=1)])
+    db.upsert_classes([class_info(professor="", schedule="", available=2)])
+
+    rows = class_rows(db)
+    assert len(rows) == 1
+    row = rows[("FGA0001", "01")]
+    assert (row.docente, row.horario, row.vagas_disponiveis) == ("", "", 2)
+
+
+def test_archive_past_periods_keeps_the_scraped_period(db, tmp_path, monkeypatch):
+    from Database.snapshots import SnapshotArchiver
+
+    archiver = SnapshotArchiver(tmp_path / "snapshots")
+    monkeypatch.setenv("ACTIVE_PERIOD", "2025.2")  # Ahead of what SIGAA lists
+    db.upsert_classes([class_info(period="2024.2"), class_info(period="2025.1")])
+
+    assert db.archive_past_periods(archiver, {"2025.1"}) == 1
+    assert set(db.get_df("all")["period"]) == {"2025.1"}
+    assert db.active_period() == "2025.1"
+
+    # The scraped period stays, and its classes aren't reported as new again
+    assert db.archive_past_periods(archiver, {"2025.1"}) == 0
+    assert db.upsert_classes([class_info(period="2025.1")]) == []
@@ -0,0 +1,92 @@
+import pytest
+
+from Jobs import job_queue
+from Jobs.job_queue import JobQueue
+
+
+class Clock:
+    """Replaces time.time in the queue, to expire leases without waiting."""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(job_queue.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def queue(tmp_path, clock):
+    queue = JobQueue(str(tmp_path / "jobs.db"), visibility_timeout=60)
+    yield queue
+    queue.close()
+
+
+def test_pending_jobs_are_deduplicated_by_key(queue):
+    assert queue.enqueue("scrape", {"department": "A"}, key="scrape:A")
+    assert not queue.enqueue("scrape", {"department": "A"}, key="scrape:A")
+    assert queue.enqueue("scrape", {"department": "B"}, key="scrape:B")
+
+    first, second = queue.lease("w1"), queue.lease("w1")
+    assert {first.payload["department"], second.payload["department"]} == {"A", "B"}
+    assert queue.lease("w1") is None
+
+
+def test_a_leased_job_is_hidden_until_the_lease_expires(queue, clock):
+    queue.enqueue("scrape", {"department": "A"}, key="scrape:A")
+    job = queue.lease("w1")
+    assert job.attempts == 1
+
+    clock.now += 59
+    assert queue.lease("w2") is None
+
+    # w1 crashed: once the visibility timeout elapsed another worker takes the job
+    clock.now += 2
+    retaken = queue.lease("w2")
+    assert (retaken.id, retaken.attempts) == (job.id, 2)
+
+
+def test_complete_from_a_worker_whose_lease_was_taken_over(queue, clock):
+    queue.enqueue("scrape", {"department": "A"}, key="scrape:A")
+    stale = queue.lease("w1")
+    clock.now += 61
+    current = queue.lease("w2")
+
+    # The late worker can neither finish the job nor schedule a duplicate
+    queue.complete(stale, "w1", repeat_after=120)
+    clock.now += 61
+    assert queue.lease("w3").id == current.id
+
+    clock.now += 61
+    queue.complete(current, "w3", repeat_after=120)
+    assert queue.lease("w4") is None
+    clock.now += 120
+    repeated = queue.lease("w4")
+    assert (repeated.payload, repeated.attempts) == ({"department": "A"}, 1)
+    assert repeated.id != current.id
+
+
+def test_failed_jobs_are_retried_after_a_delay(queue, clock):
+    queue.enqueue("scrape", {"department": "A"})
+    job = queue.lease("w1")
+    queue.fail(job, "w1", "SIGAA is down", retry_after=30)
+
+    assert queue.lease("w1") is None
+    clock.now += 30
+    assert queue.lease("w1").attempts == 2
+
+
+def test_events_are_consumed_after_a_cursor(queue):
+    queue.publish("classes_updated", {"department": "A"})
+    cursor = queue.last_event_id()
+    queue.publish("classes_updated", {"department": "B"})
+    queue.publish("other", {})
+
+    events = queue.consume("classes_updated", cursor)
+    assert [event.payload["department"] for event in events] == ["B"]
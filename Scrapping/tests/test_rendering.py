@@ -0,0 +1,82 @@
+import pandas as pd
+import pytest
+
+from Telegram.rendering import ClassRenderer
+
+
+def classes(*spots: int, professor: str = "FULANO DE TAL (60h)") -> pd.DataFrame:
+    """Classes of FGA0001 in the Database.get_df format, one per number of available spots."""
+    return pd.DataFrame([
+        {
+            "subject": "MATERIA FGA0001", "code": "FGA0001", "num": f"{index:02}", "period": "2025.1",
+            "professor": professor, "schedule": "35T23", "offered_spots": 40,
+            "occupied_spots": 40 - available, "available_spots": available, "local": "FGA - S1",
+        }
+        for index, available in enumerate(spots, start=1)
+    ])
+
+
+@pytest.mark.parametrize("blocks, pages", [
+    ([], []),
+    (["abc", "de"], ["abcde"]),
+    (["abc", "de", "f"], ["abcde", "f"]),
+    (["abcdef"], ["abcde", "f"]),
+    (["ab", "cdefghijklm"], ["ab", "cdefg", "hijkl", "m"]),
+    (["abcdefghij", "k"], ["abcde", "fghij", "k"]),
+])
+def test_paginate(blocks, pages):
+    assert ClassRenderer(limit=5).paginate(blocks) == pages
+
+
+def test_paginate_respects_the_telegram_limit():
+    renderer = ClassRenderer()
+    pages = renderer.paginate(["x" * 1000] * 9 + ["y" * 5000])
+
+    assert [len(page) for page in pages] == [4000, 4000, 1000, 4096, 904]
+    assert "".join(pages) == "x" * 9000 + "y" * 5000
+
+
+def test_pages_are_rendered_once_per_query_and_version():
+    renderer = ClassRenderer()
+    pages = renderer.pages("FGA0001", classes(2, 5), version=1)
+
+    assert len(pages) == 1
+    assert pages[0].startswith("2 vagas encontradas para MATERIA FGA0001 turma 01 com FULANO DE TAL (60h)")
+    # Served from the cache, whatever the DataFrame
+    assert renderer.pages("FGA0001", classes(7), version=1) is pages
+    assert renderer.page("FGA0001", 1, 0) == (pages[0], 1)
+
+
+def test_a_new_version_renders_the_rows_again():
+    renderer = ClassRenderer()
+    renderer.pages("FGA0001", classes(2), version=1)
+    pages = renderer.pages("FGA0001", classes(3), version=2)
+
+    assert pages[0].startswith("3 vagas")
+    assert renderer.page("FGA0001", 2, 0) == (pages[0], 1)
+    # A message sent before the update keeps paging through its own version
+    assert renderer.page("FGA0001", 1, 0)[0].startswith("2 vagas")
+
+
+def test_least_recently_used_results_are_evicted():
+    renderer = ClassRenderer(max_queries=2)
+    renderer.pages("A", classes(1), version=1)
+    renderer.pages("B", classes(2), version=1)
+    renderer.pages("A", classes(1), version=1)
+    renderer.pages("C", classes(3), version=1)
+
+    assert renderer.page("A", 1, 0) is not None
+    assert renderer.page("B", 1, 0) is None
+    assert renderer.page("C", 1, 0) is not None
+
+
+def test_page_out_of_range_or_unknown():
+    renderer = ClassRenderer(limit=200)
+    pages = renderer.pages("FGA0001", classes(1, 2, 3), version=1)
+
+    assert len(pages) == 3
+    assert renderer.page("FGA0001", 1, 2) == (pages[2], 3)
+    assert renderer.page("FGA0001", 1, 3) is None
+    assert renderer.page("FGA0001", 1, -1) is None
+    assert renderer.page("FGA0001", 2, 0) is None
+    assert renderer.page("FGA0002", 1, 0) is None
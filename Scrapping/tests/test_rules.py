@@ -0,0 +1,66 @@
+import pytest
+
+from Telegram.rules import RuleIndex, WatchRule, parse_watch, schedule_slots
+
+
+def rule(rule_id, chat_id, code=None, professor=None, num=None, min_seats=1, busy=""):
+    return WatchRule(rule_id, chat_id, code, professor, num, min_seats, schedule_slots(busy))
+
+
+def event(code="FGA0001", num="01", professor="JOSÉ DA SILVA-SANTOS (60h)", schedule="35T23", available=2):
+    """A change event, see Database.upsert_classes."""
+    return {"code": code, "num": num, "professor": professor, "schedule": schedule, "available_spots": available}
+
+
+def test_parse_watch():
+    assert parse_watch(["fga0001", "prof=José", "turma=01", "vagas=2", "evitar=24M12,35T23"]) == {
+        "code": "FGA0001",
+        "professor": "JOSE",
+        "class_number": "01",
+        "min_seats": 2,
+        "busy_schedule": "24M12 35T23",
+    }
+    # Stored as the word matched against the class's professor
+    assert parse_watch(["prof=D'Avila"]) == {"professor": "AVILA"}
+
+
+@pytest.mark.parametrize("args", [
+    [],
+    ["vagas=2"],
+    ["FGA01"],
+    ["FGA0001", "vagas=0"],
+    ["FGA0001", "evitar=segunda"],
+    ["FGA0001", "sala=S1"],
+    ["prof=Silva-Santos"],
+    ["prof=Da Silva"],
+    ["prof=J."],
+])
+def test_parse_watch_rejects_invalid_arguments(args):
+    with pytest.raises(ValueError):
+        parse_watch(args)
+
+
+def test_rule_index_matches_code_and_professor_rules():
+    index = RuleIndex([
+        rule(1, 100, code="FGA0001"),
+        rule(2, 100, professor="SILVA"),
+        rule(3, 200, professor="SANTOS", min_seats=3),
+        rule(4, 300, code="FGA0001", num="1", busy="5T3"),
+        rule(5, 400, code="FGA0002"),
+        rule(6, 500, professor="JOSE", num="2"),
+    ])
+
+    changed = event()
+    assert index.match([changed]) == {100: [changed]}
+    assert index.match([event(available=3)]) == {100: [event(available=3)], 200: [event(available=3)]}
+    assert index.match([event(code="FGA0003", num="02", schedule="24M12")]) == {
+        100: [event(code="FGA0003", num="02", schedule="24M12")],
+        500: [event(code="FGA0003", num="02", schedule="24M12")],
+    }
+    assert index.match([event(schedule="24M12", available=1)])[300] == [event(schedule="24M12", available=1)]
+    assert index.match([event(code="FGA0009", professor=None)]) == {}
+
+
+def test_rule_index_needs_a_code_or_a_professor():
+    with pytest.raises(ValueError):
+        RuleIndex([rule(1, 100, num="01")])
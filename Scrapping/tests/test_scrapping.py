@@ -0,0 +1,50 @@
+import pytest
+from selenium.common.exceptions import (InvalidSessionIdException, NoSuchElementException, TimeoutException,
+                                        WebDriverException)
+
+from SIGAA.resilience import ScraperError, StepTimeouts
+from SIGAA.scrapping import SIGAA_Scraper, is_browser_failure
+
+
+class FailingDriver:
+    def __init__(self, error: Exception):
+        self.error = error
+
+    def get(self, url):
+        raise self.error
+
+
+def scraper_with(error: Exception) -> SIGAA_Scraper:
+    """A scraper whose browser fails to load pages, without launching Firefox."""
+    scraper = SIGAA_Scraper.__new__(SIGAA_Scraper)
+    scraper.timeouts = StepTimeouts()
+    scraper.driver = FailingDriver(error)
+    return scraper
+
+
+@pytest.mark.parametrize("error", [
+    TimeoutException("Timed out"),
+    WebDriverException("Reached error page: about:neterror?e=dnsNotFound&u=https%3A//sigaa.unb.br/"),
+    WebDriverException("Reached error page: about:neterror?e=connectionFailure&u=https%3A//sigaa.unb.br/"),
+])
+def test_unreachable_portal_is_a_scraper_error(error):
+    with pytest.raises(ScraperError):
+        scraper_with(error).access_portal()
+
+
+def test_driver_failures_on_the_portal_are_kept():
+    with pytest.raises(InvalidSessionIdException):
+        scraper_with(InvalidSessionIdException("Tried to run command without establishing a connection")).access_portal()
+
+
+@pytest.mark.parametrize("error, restart", [
+    (ScraperError("SIGAA is unreachable"), False),
+    (TimeoutException("Timed out"), False),
+    (NoSuchElementException("No element"), False),
+    (ValueError("not enough values to unpack"), False),
+    (InvalidSessionIdException("Session deleted"), True),
+    (WebDriverException("Failed to decode response from marionette"), True),
+    (ConnectionRefusedError(111, "Connection refused"), True),
+])
+def test_only_browser_failures_restart_the_browser(error, restart):
+    assert is_browser_failure(error) is restart
@@ -0,0 +1,88 @@
+import pytest
+
+from SIGAA.resilience import ScraperError
+from SIGAA.sharding import ShardedScraper, format_report
+
+
+class FlakyScraper:
+    """Scraper session failing on the departments in `broken`, a given number of times each."""
+
+    failures: dict[str, int] = {}
+    launched: list["FlakyScraper"] = []
+
+    def __init__(self):
+        self.department = None
+        self.alive = True
+        self.launched.append(self)
+
+    def access_portal(self):
+        pass
+
+    def access_classes(self, department=None):
+        if self.failures.get(department, 0) > 0:
+            self.failures[department] -= 1
+            raise ScraperError(f"department {department} did not load")
+        self.department = department
+
+    def update_classes_info(self) -> list[dict]:
+        return [{"Código": f"{self.department}0001"}]
+
+    def quit(self):
+        self.alive = False
+
+
+def run(departments: list[str], failures: dict[str, int], retries: int = 1):
+    FlakyScraper.failures = dict(failures)
+    FlakyScraper.launched = []
+    return ShardedScraper(departments, shards=2, scraper_factory=FlakyScraper, retries=retries).run()
+
+
+def test_failed_departments_are_retried():
+    data, reports, failed = run(["A", "B", "C"], {"B": 1})
+
+    assert failed == []
+    assert sorted(row["Código"] for row in data) == ["A0001", "B0001", "C0001"]
+    assert "missing" not in format_report(reports)
+
+
+def test_departments_failing_every_attempt_are_returned():
+    data, reports, failed = run(["A", "B", "C"], {"B": 2})
+
+    assert failed == ["B"]
+    assert sorted(row["Código"] for row in data) == ["A0001", "C0001"]
+    assert "missing departments: B" in format_report(reports)
+
+
+def test_all_departments_failing_raises():
+    with pytest.raises(ScraperError):
+        run(["A", "B"], {"A": 5, "B": 5}, retries=2)
+
+
+def test_sessions_are_reused_between_runs():
+    FlakyScraper.failures, FlakyScraper.launched = {}, []
+    sharded = ShardedScraper(["A", "B", "C"], shards=2, scraper_factory=FlakyScraper)
+
+    for _ in range(3):
+        data, _, failed = sharded.run()
+        assert (len(data), failed) == (3, [])
+    assert len(FlakyScraper.launched) <= 2
+    assert all(scraper.alive for scraper in FlakyScraper.launched)
+
+    sharded.close()
+    assert not any(scraper.alive for scraper in FlakyScraper.launched)
+
+
+def test_failed_browsers_are_replaced():
+    class CrashingScraper(FlakyScraper):
+        def update_classes_info(self):
+            if self.failures.pop("crash", 0):
+                raise ConnectionError("geckodriver died")
+            return super().update_classes_info()
+
+    FlakyScraper.failures, FlakyScraper.launched = {"crash": 1}, []
+    sharded = ShardedScraper(["A"], shards=1, scraper_factory=CrashingScraper)
+
+    data, _, failed = sharded.run()
+    assert (len(data), failed) == (1, [])
+    crashed, replacement = FlakyScraper.launched
+    assert not crashed.alive and replacement.alive
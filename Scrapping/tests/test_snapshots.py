@@ -0,0 +1,77 @@
+from datetime import datetime
+
+import pyarrow.parquet as pq
+
+from Database.snapshots import SnapshotArchiver
+
+
+def record(num="01", available=5, period="2024.2") -> dict:
+    """A class in the SIGAA_Scraper.update_classes_info format."""
+    return {
+        "Matéria": "MATERIA FGA0001",
+        "Código": "FGA0001",
+        "N_o": num,
+        "Ano-Período": period,
+        "Docente": "FULANO DE TAL (60h)",
+        "Horário": "35T23",
+        "Qtde Vagas Ofertadas": 40,
+        "Qtde Vagas Ocupadas": 40 - available,
+        "Qtde Vagas Disponíveis": available,
+        "Local": "FGA - S1",
+    }
+
+
+def test_write_partitions_by_period_and_skips_repeated_cycles(tmp_path):
+    archiver = SnapshotArchiver(tmp_path)
+    when = datetime(2025, 3, 27, 21, 18)
+
+    written = archiver.write([record(period="2025.1"), record(period="2024.2")], when)
+    assert sorted(path.relative_to(tmp_path).parts[0] for path in written) == ["period=2024.2", "period=2025.1"]
+    assert archiver.write([record(period="2025.1"), record(period="2024.2")], when) == []
+    assert len(archiver.load_latest()) == 2
+
+
+def test_archive_period_keeps_the_newest_copy_of_each_class(tmp_path):
+    archiver = SnapshotArchiver(tmp_path)
+
+    archiver.archive_period("2024.2", [record("01", available=5), record("02", available=1)])
+    archiver.archive_period("2024.2", [record("01", available=3)])
+    path = archiver.archive_period("2024.2", [record("01", available=2), record("03", available=7)])
+
+    table = pq.read_table(path)
+    assert table.num_rows == 3
+    spots = dict(zip(table.column("num").to_pylist(), table.column("available_spots").to_pylist()))
+    assert spots == {"01": 2, "02": 1, "03": 7}
+
+
+def test_latest_keeps_the_newest_cycle_of_each_department(tmp_path):
+    archiver = SnapshotArchiver(tmp_path)
+    archiver.write([record("01", available=5)], datetime(2025, 3, 27, 21, 0), source="673")
+    archiver.write([record("02")], datetime(2025, 3, 27, 21, 1), source="FGA/UnB")
+    archiver.write([record("01", available=2)], datetime(2025, 3, 27, 21, 2), source="673")
+
+    assert len(archiver.latest()) == 2
+    spots = {row["N_o"]: row["Qtde Vagas Disponíveis"] for row in archiver.load_latest()}
+    assert spots == {"01": 2, "02": 5}
+
+    # A full cycle covers the departments scraped before it, not the ones scraped after
+    archiver.write([record("03")], datetime(2025, 3, 27, 21, 3))
+    assert {row["N_o"] for row in archiver.load_latest()} == {"03"}
+    archiver.write([record("01", available=1)], datetime(2025, 3, 28, 8, 0), source="673")
+    assert {row["N_o"] for row in archiver.load_latest()} == {"01", "03"}
+
+
+def test_past_days_are_compacted(tmp_path):
+    archiver = SnapshotArchiver(tmp_path)
+    for minute in range(5):
+        archiver.write([record("01", available=minute)], datetime(2025, 3, 27, 21, minute))
+    archiver.write([record("02")], datetime(2025, 3, 27, 21, 10), source="673")
+    day = tmp_path / "period=2024.2" / "date=2025-03-27"
+    assert len(list(day.glob("snapshot-*.parquet"))) == 6
+
+    archiver.write([record("03")], datetime(2025, 3, 28, 8, 0), source="674")
+    assert sorted(path.name for path in day.iterdir()) == [
+        "compacted.parquet", "snapshot-210400000000.parquet", "snapshot-211000000000-673.parquet",
+    ]
+    assert pq.read_table(day / "compacted.parquet").column("available_spots").to_pylist() == [0, 1, 2, 3]
+    assert {row["N_o"] for row in archiver.load_latest()} == {"01", "02", "03"}
@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from Benchmarks.fake_bot_api import FakeBotAPI
+from Database.database import Database
+from Telegram.telegram_bot import SIGAAMOS_bot
+
+
+def class_info(code: str, available: int) -> dict:
+    return {
+        "Matéria": f"MATERIA {code}", "Código": code, "N_o": "01", "Ano-Período": "2025.1",
+        "Docente": "FULANO DE TAL (60h)", "Horário": "35T23", "Qtde Vagas Ofertadas": "40",
+        "Qtde Vagas Ocupadas": str(40 - available), "Qtde Vagas Disponíveis": available, "Local": "FGA - S1",
+    }
+
+
+@pytest.fixture
+def api():
+    with FakeBotAPI() as api:
+        yield api
+
+
+@pytest.fixture
+def bot(tmp_path, api):
+    db = Database(f"sqlite:///{tmp_path}/chats.db", f"sqlite:///{tmp_path}/classes.db")
+    db.upsert_classes([class_info("FGA0001", 3), class_info("FGA0002", 4)])
+    for chat_id, code in ((1, "FGA0001"), (2, "FGA0002")):
+        db.add_chat(chat_id)
+        db.add_item(chat_id, code)
+    yield SIGAAMOS_bot("123:TEST", db, base_url=api.url)
+    db.close()
+
+
+def notify(bot: SIGAAMOS_bot, codes: set[str] | None = None) -> None:
+    async def run():
+        await bot.bot.initialize()
+        await bot._notify_users(codes)
+        await bot.bot.shutdown()
+
+    asyncio.run(run())
+
+
+def test_notify_users_sends_every_watched_subject(bot, api):
+    notify(bot)
+    assert api.calls.get("sendMessage") == 2
+
+
+def test_notify_users_restricted_to_changed_subjects(bot, api):
+    notify(bot, {"FGA0002"})
+    assert api.calls.get("sendMessage") == 1
+
+    notify(bot, set())
+    assert api.calls.get("sendMessage") == 1